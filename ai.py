@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
+import time
 from typing import Optional
 
 from openai import AsyncOpenAI
@@ -10,25 +13,72 @@ from config import AI_MODEL, OPENAI_API_KEY, OPENAI_BASE_URL
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_SYSTEM_PROMPT = "Discord向けの称賛メッセージを書く。日本語1文、絵文字1つ以上、25〜60文字で返す。"
+
+_client: AsyncOpenAI | None = None
+_client_lock = asyncio.Lock()
+
+_RECENT_TTL_SECONDS = 60.0
+_recent: dict[str, tuple[float, str]] = {}
+# caps parallel OpenAI requests during AC bursts
+_request_sem = asyncio.Semaphore(4)
+
+
+async def _get_client() -> AsyncOpenAI:
+    global _client
+    if _client is not None:
+        return _client
+    async with _client_lock:
+        if _client is None:
+            client_kwargs = {"api_key": OPENAI_API_KEY}
+            if OPENAI_BASE_URL:
+                client_kwargs["base_url"] = OPENAI_BASE_URL
+            _client = AsyncOpenAI(**client_kwargs)
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is None:
+        return
+    client, _client = _client, None
+    await client.close()
+
 
 def _extract_text(resp) -> Optional[str]:
-    if hasattr(resp, "output_text"):
+    try:
         text = resp.output_text
-        if text:
-            return text.strip()
+    except AttributeError:
+        text = None
+    if text:
+        return text.strip()
     output = getattr(resp, "output", None)
     if not output:
         return None
     for item in output:
-        if getattr(item, "type", None) == "message":
-            for part in getattr(item, "content", []):
-                if getattr(part, "type", None) == "output_text":
-                    text = getattr(part, "text", "")
-                    if text:
-                        return text.strip()
+        item_type = getattr(item, "type", None)
+        if item_type != "message":
+            continue
+        for part in getattr(item, "content", None) or ():
+            if getattr(part, "type", None) != "output_text":
+                continue
+            text = getattr(part, "text", "")
+            if text:
+                return text.strip()
     return None
 
 
+def _recent_key(prompt: str, system_prompt: str, model: str) -> str:
+    return hashlib.sha1(f"{model}\0{system_prompt}\0{prompt}".encode()).hexdigest()
+
+
+def _remember(key: str, text: str) -> None:
+    now = time.monotonic()
+    for stale in [k for k, (ts, _) in _recent.items() if now - ts >= _RECENT_TTL_SECONDS]:
+        del _recent[stale]
+    _recent[key] = (now, text)
+
+
 async def generate_message(
     prompt: str,
     *,
@@ -37,23 +87,29 @@ async def generate_message(
 ) -> Optional[str]:
     if not OPENAI_API_KEY:
         return None
+    sys_prompt = system_prompt or DEFAULT_SYSTEM_PROMPT
+    model_name = model or AI_MODEL
+    key = _recent_key(prompt, sys_prompt, model_name)
+    cached = _recent.get(key)
+    if cached and time.monotonic() - cached[0] < _RECENT_TTL_SECONDS:
+        return cached[1]
     try:
-        client_kwargs = {"api_key": OPENAI_API_KEY}
-        if OPENAI_BASE_URL:
-            client_kwargs["base_url"] = OPENAI_BASE_URL
-        client = AsyncOpenAI(**client_kwargs)
-        sys_prompt = system_prompt or "Discord向けの称賛メッセージを書く。日本語1文、絵文字1つ以上、25〜60文字で返す。"
-        resp = await client.responses.create(
-            model=model or AI_MODEL,
-            input=[
-                {
-                    "role": "system",
-                    "content": sys_prompt,
-                },
-                {"role": "user", "content": prompt},
-            ],
-        )
-        return _extract_text(resp)
+        client = await _get_client()
+        async with _request_sem:
+            resp = await client.responses.create(
+                model=model_name,
+                input=[
+                    {
+                        "role": "system",
+                        "content": sys_prompt,
+                    },
+                    {"role": "user", "content": prompt},
+                ],
+            )
+        text = _extract_text(resp)
     except Exception:
         logger.exception("AI message generation failed")
         return None
+    if text:
+        _remember(key, text)
+    return text
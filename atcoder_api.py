@@ -3,58 +3,219 @@ from __future__ import annotations
 import asyncio
 import logging
 import random
-from typing import Any
+import time
+from collections import deque
+from typing import Any, Callable, Mapping
+from urllib.parse import urlparse
 
 import aiohttp
+import orjson
+
+from config import POLL_INTERVAL_SECONDS
 
 
 logger = logging.getLogger(__name__)
 
 BASE = "https://kenkoooo.com/atcoder"
+PROBLEM_MODELS_URL = f"{BASE}/resources/problem-models.json"
+PROBLEMS_URL = f"{BASE}/resources/problems.json"
 
+_TRANSIENT_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+_RETRYABLE_ERRORS = (
+    aiohttp.ServerTimeoutError,
+    aiohttp.ServerDisconnectedError,
+    aiohttp.ClientConnectorError,
+    asyncio.TimeoutError,
+)
+_USER_FETCH_CONCURRENCY = 8
+_user_fetch_sem = asyncio.Semaphore(_USER_FETCH_CONCURRENCY)
+_BACKOFF_BASE = 1.0
+_BACKOFF_CAP = 30.0
 
-async def fetch_json(session: aiohttp.ClientSession, url: str) -> Any:
+
+_CIRCUIT_FAILURE_THRESHOLD = 5
+_CIRCUIT_WINDOW_SECONDS = 60.0
+_CIRCUIT_COOLDOWN_SECONDS = 30.0
+
+
+class CircuitOpenError(aiohttp.ClientError):
+    pass
+
+
+class HostCircuit:
+    def __init__(self) -> None:
+        self.failures: deque[float] = deque()
+        self.opened_at: float | None = None
+        self.probing_since: float | None = None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < _CIRCUIT_COOLDOWN_SECONDS:
+            return False
+        # half-open: a single probe goes through and everything else waits for its result;
+        # a probe that never reported back (cancelled, say) is replaced after another cooldown
+        if self.probing_since is not None and now - self.probing_since < _CIRCUIT_COOLDOWN_SECONDS:
+            return False
+        self.probing_since = now
+        return True
+
+    def record_failure(self) -> None:
+        now = time.monotonic()
+        if self.probing_since is not None:
+            # failed probe: stay open for another cooldown
+            self.probing_since = None
+            self.opened_at = now
+            return
+        self.failures.append(now)
+        while self.failures and now - self.failures[0] > _CIRCUIT_WINDOW_SECONDS:
+            self.failures.popleft()
+        if len(self.failures) >= _CIRCUIT_FAILURE_THRESHOLD:
+            self.opened_at = now
+
+    def record_success(self) -> None:
+        self.failures.clear()
+        self.opened_at = None
+        self.probing_since = None
+
+
+_circuits: dict[str, HostCircuit] = {}
+
+
+def _circuit_for(url: str) -> HostCircuit:
+    host = urlparse(url).netloc
+    circuit = _circuits.get(host)
+    if circuit is None:
+        circuit = _circuits[host] = HostCircuit()
+    return circuit
+
+
+def _next_backoff(prev_delay: float) -> float:
+    # decorrelated jitter: spreads concurrent retries instead of syncing them
+    return min(_BACKOFF_CAP, random.uniform(_BACKOFF_BASE, prev_delay * 3))
+
+
+_inflight: dict[tuple[str, tuple[tuple[str, str], ...]], asyncio.Future] = {}
+
+
+async def _fetch(
+    session: aiohttp.ClientSession,
+    url: str,
+    headers: dict[str, str] | None = None,
+) -> tuple[int, bytes, Mapping[str, str]]:
+    # single-flight: concurrent callers for the same request share one download
+    key = (url, tuple(sorted(headers.items())) if headers else ())
+    fut = _inflight.get(key)
+    if fut is not None:
+        try:
+            return await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            # only the leader was cancelled; this waiter still wants the result, so fetch again
+            if asyncio.current_task().cancelling() or not fut.cancelled():
+                raise
+            return await _fetch(session, url, headers)
+    fut = asyncio.get_running_loop().create_future()
+    _inflight[key] = fut
+    try:
+        result = await _fetch_once(session, url, headers)
+    except asyncio.CancelledError:
+        fut.cancel()
+        raise
+    except BaseException as exc:
+        fut.set_exception(exc)
+        # mark retrieved so a future without waiters doesn't log "never retrieved"
+        fut.exception()
+        raise
+    else:
+        fut.set_result(result)
+        return result
+    finally:
+        del _inflight[key]
+
+
+async def _fetch_once(
+    session: aiohttp.ClientSession,
+    url: str,
+    headers: dict[str, str] | None = None,
+) -> tuple[int, bytes, Mapping[str, str]]:
     retries = 3
-    base_delay = 1.0
+    prev_delay = _BACKOFF_BASE
+    circuit = _circuit_for(url)
     for attempt in range(1, retries + 1):
+        if not circuit.allow():
+            raise CircuitOpenError(f"circuit open for {urlparse(url).netloc}")
         try:
-            async with session.get(url, timeout=30) as resp:
-                if resp.status in {429, 500, 502, 503, 504}:
+            async with session.get(url, headers=headers, timeout=30) as resp:
+                if resp.status in _TRANSIENT_STATUS:
+                    circuit.record_failure()
+                    if attempt == retries:
+                        logger.error("HTTP %s for %s after %d attempts", resp.status, url, retries)
+                        resp.raise_for_status()
                     retry_after = resp.headers.get("Retry-After")
                     if retry_after:
                         delay = float(retry_after)
                     else:
-                        delay = base_delay * (2 ** (attempt - 1)) + random.random()
+                        delay = prev_delay = _next_backoff(prev_delay)
                     logger.warning("Transient HTTP %s for %s, retrying in %.1fs", resp.status, url, delay)
                     await asyncio.sleep(delay)
                     continue
+                # the host answered, so a permanent status (e.g. 404 for an unknown user) still counts
+                # as healthy; it must also settle a half-open probe
+                circuit.record_success()
+                # any other non-2xx status is permanent; raise without retrying
                 resp.raise_for_status()
-                return await resp.json()
-        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
-            if isinstance(exc, aiohttp.ClientResponseError) and exc.status in {400, 401, 403, 404}:
-                raise
+                body = b"" if resp.status == 304 else await resp.read()
+                return resp.status, body, resp.headers
+        except _RETRYABLE_ERRORS as exc:
+            circuit.record_failure()
             if attempt == retries:
                 logger.exception("HTTP failed for %s", url)
                 raise
-            delay = base_delay * (2 ** (attempt - 1)) + random.random()
+            delay = prev_delay = _next_backoff(prev_delay)
             logger.warning("HTTP error for %s (%s). retrying in %.1fs", url, exc, delay)
             await asyncio.sleep(delay)
+    raise AssertionError("unreachable")
 
 
-async def fetch_problem_models(session: aiohttp.ClientSession) -> list[dict[str, Any]]:
-    url = f"{BASE}/resources/problem-models.json"
-    return await fetch_json(session, url)
+async def fetch_json(session: aiohttp.ClientSession, url: str) -> Any:
+    _, body, _ = await _fetch(session, url)
+    return orjson.loads(body)
 
 
-async def fetch_problems(session: aiohttp.ClientSession) -> list[dict[str, Any]]:
-    url = f"{BASE}/resources/problems.json"
-    return await fetch_json(session, url)
+async def fetch_conditional(
+    session: aiohttp.ClientSession,
+    url: str,
+    etag: str | None = None,
+    last_modified: str | None = None,
+) -> tuple[bytes | None, str | None, str | None]:
+    # returns (None, etag, last_modified) when the server answers 304 Not Modified
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    status, body, resp_headers = await _fetch(session, url, headers or None)
+    if status == 304:
+        return None, etag, last_modified
+    return body, resp_headers.get("ETag"), resp_headers.get("Last-Modified")
+
+
+async def _fetch_user_json(session: aiohttp.ClientSession, url: str) -> Any:
+    # per-user endpoints share one concurrency budget so fan-out can't flood AtCoder
+    async with _user_fetch_sem:
+        return await fetch_json(session, url)
+
+
+def is_accepted(submission: dict[str, Any]) -> bool:
+    return submission.get("result") == "AC"
 
 
 async def fetch_user_results(
     session: aiohttp.ClientSession,
     atcoder_id: str,
     since_epoch: int | None = None,
+    predicate: Callable[[dict[str, Any]], bool] | None = None,
 ) -> list[dict[str, Any]]:
     raw = atcoder_id.strip()
     candidates = [raw]
@@ -63,31 +224,42 @@ async def fetch_user_results(
         candidates.append(lower)
     from_second = since_epoch if since_epoch and since_epoch > 0 else 0
 
-    # v3 user submissions (preferred)
-    for candidate in candidates:
-        url = f"{BASE}/atcoder-api/v3/user/submissions?user={candidate}&from_second={from_second}"
-        try:
-            return await fetch_json(session, url)
-        except aiohttp.ClientResponseError as exc:
-            if exc.status == 404:
-                continue
-            raise
-
-    # legacy results API fallback
-    for candidate in candidates:
-        url = f"{BASE}/atcoder-api/results?user={candidate}"
+    urls = [
+        # v3 user submissions (preferred)
+        *(f"{BASE}/atcoder-api/v3/user/submissions?user={c}&from_second={from_second}" for c in candidates),
+        # legacy results API fallback
+        *(f"{BASE}/atcoder-api/results?user={c}" for c in candidates),
+    ]
+    for url in urls:
         try:
-            return await fetch_json(session, url)
+            data = await _fetch_user_json(session, url)
         except aiohttp.ClientResponseError as exc:
             if exc.status == 404:
                 continue
             raise
+        if predicate is None:
+            return data
+        return [s for s in data if predicate(s)]
 
     logger.info("no submissions found via API for user: %s", atcoder_id)
     return []
 
 
+_rating_cache: dict[str, tuple[float, int]] = {}
+
+
 async def fetch_user_rating(session: aiohttp.ClientSession, atcoder_id: str) -> int | None:
+    key = atcoder_id.strip().lower()
+    cached = _rating_cache.get(key)
+    if cached and time.monotonic() - cached[0] < POLL_INTERVAL_SECONDS:
+        return cached[1]
+    rating = await _fetch_user_rating(session, atcoder_id)
+    if rating is not None:
+        _rating_cache[key] = (time.monotonic(), rating)
+    return rating
+
+
+async def _fetch_user_rating(session: aiohttp.ClientSession, atcoder_id: str) -> int | None:
     raw = atcoder_id.strip()
     candidates = [raw]
     lower = raw.lower()
@@ -97,7 +269,7 @@ async def fetch_user_rating(session: aiohttp.ClientSession, atcoder_id: str) ->
     for candidate in candidates:
         url = f"https://atcoder.jp/users/{candidate}/history/json"
         try:
-            data = await fetch_json(session, url)
+            data = await _fetch_user_json(session, url)
             break
         except aiohttp.ClientResponseError as exc:
             if exc.status == 404:
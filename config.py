@@ -1,45 +1,102 @@
+from __future__ import annotations
+
 import os
+from dataclasses import dataclass
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
+_TRUE_VALUES = frozenset({"1", "true", "yes", "on"})
+
 
 def _get_bool(key: str, default: bool) -> bool:
     val = os.getenv(key)
     if val is None:
         return default
-    return val.lower() in {"1", "true", "yes", "on"}
+    return val.lower() in _TRUE_VALUES
 
 
 def _parse_csv(value: str) -> list[str]:
     return [item.strip() for item in value.split(",") if item.strip()]
 
 
-DISCORD_TOKEN = os.getenv("DISCORD_TOKEN", "")
-SQLITE_PATH = os.getenv("SQLITE_PATH", "atcrank.db")
-GUILD_ID = int(os.getenv("GUILD_ID", "0")) or None
-
-POLL_INTERVAL_SECONDS = int(os.getenv("POLL_INTERVAL_SECONDS", "180"))
-INITIAL_FETCH_EPOCH = int(os.getenv("INITIAL_FETCH_EPOCH", "1768748400"))
-
-AI_ENABLED = _get_bool("AI_ENABLED", True)
-AI_PROBABILITY = int(os.getenv("AI_PROBABILITY", "20"))
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "")
-_raw_ai_model = os.getenv("AI_MODEL", "gpt-5-mini")
-_notify_models_env = os.getenv("AI_MODELS_NOTIFY", "")
-_notify_models = _parse_csv(_notify_models_env) if _notify_models_env else _parse_csv(_raw_ai_model)
-AI_MODEL = _notify_models[0] if _notify_models else _raw_ai_model
-AI_MODELS_NOTIFY = _notify_models or [AI_MODEL]
-_raw_celebration = os.getenv("AI_MODEL_CELEBRATION", AI_MODEL)
-_celebration_list = _parse_csv(_raw_celebration)
-AI_MODEL_CELEBRATION = _celebration_list[0] if _celebration_list else _raw_celebration
-
-PROBLEMS_SYNC_INTERVAL_SECONDS = int(os.getenv("PROBLEMS_SYNC_INTERVAL_SECONDS", "21600"))
-HEALTHCHECK_INTERVAL_SECONDS = int(os.getenv("HEALTHCHECK_INTERVAL_SECONDS", "21600"))
-
-LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-LOG_FILE = os.getenv("LOG_FILE", "logs/atcrank.log")
-LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", "1048576"))
-LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+def _get_int(key: str, default: int) -> int:
+    return int(os.getenv(key, str(default)))
+
+
+@dataclass(slots=True, frozen=True)
+class Config:
+    DISCORD_TOKEN: str
+    SQLITE_PATH: str
+    GUILD_ID: int | None
+    POLL_INTERVAL_SECONDS: int
+    INITIAL_FETCH_EPOCH: int
+    AI_ENABLED: bool
+    AI_PROBABILITY: int
+    OPENAI_API_KEY: str
+    OPENAI_BASE_URL: str
+    AI_MODEL: str
+    AI_MODELS_NOTIFY: list[str]
+    AI_MODEL_CELEBRATION: str
+    PROBLEMS_SYNC_INTERVAL_SECONDS: int
+    HEALTHCHECK_INTERVAL_SECONDS: int
+    LOG_LEVEL: str
+    LOG_FILE: str
+    LOG_MAX_BYTES: int
+    LOG_BACKUP_COUNT: int
+
+    @classmethod
+    def from_env(cls) -> Config:
+        raw_ai_model = os.getenv("AI_MODEL", "gpt-5-mini")
+        notify_models = _parse_csv(os.getenv("AI_MODELS_NOTIFY", "") or raw_ai_model)
+        ai_model = notify_models[0] if notify_models else raw_ai_model
+        raw_celebration = os.getenv("AI_MODEL_CELEBRATION", ai_model)
+        celebration_list = _parse_csv(raw_celebration)
+        return cls(
+            DISCORD_TOKEN=os.getenv("DISCORD_TOKEN", ""),
+            SQLITE_PATH=os.getenv("SQLITE_PATH", "atcrank.db"),
+            GUILD_ID=_get_int("GUILD_ID", 0) or None,
+            POLL_INTERVAL_SECONDS=_get_int("POLL_INTERVAL_SECONDS", 180),
+            INITIAL_FETCH_EPOCH=_get_int("INITIAL_FETCH_EPOCH", 1768748400),
+            AI_ENABLED=_get_bool("AI_ENABLED", True),
+            AI_PROBABILITY=_get_int("AI_PROBABILITY", 20),
+            OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", ""),
+            OPENAI_BASE_URL=os.getenv("OPENAI_BASE_URL", ""),
+            AI_MODEL=ai_model,
+            AI_MODELS_NOTIFY=notify_models or [ai_model],
+            AI_MODEL_CELEBRATION=celebration_list[0] if celebration_list else raw_celebration,
+            PROBLEMS_SYNC_INTERVAL_SECONDS=_get_int("PROBLEMS_SYNC_INTERVAL_SECONDS", 21600),
+            HEALTHCHECK_INTERVAL_SECONDS=_get_int("HEALTHCHECK_INTERVAL_SECONDS", 21600),
+            LOG_LEVEL=os.getenv("LOG_LEVEL", "INFO"),
+            LOG_FILE=os.getenv("LOG_FILE", "logs/atcrank.log"),
+            LOG_MAX_BYTES=_get_int("LOG_MAX_BYTES", 1048576),
+            LOG_BACKUP_COUNT=_get_int("LOG_BACKUP_COUNT", 5),
+        )
+
+
+settings = Config.from_env()
+
+
+DISCORD_TOKEN = settings.DISCORD_TOKEN
+SQLITE_PATH = settings.SQLITE_PATH
+GUILD_ID = settings.GUILD_ID
+
+POLL_INTERVAL_SECONDS = settings.POLL_INTERVAL_SECONDS
+INITIAL_FETCH_EPOCH = settings.INITIAL_FETCH_EPOCH
+
+AI_ENABLED = settings.AI_ENABLED
+AI_PROBABILITY = settings.AI_PROBABILITY
+OPENAI_API_KEY = settings.OPENAI_API_KEY
+OPENAI_BASE_URL = settings.OPENAI_BASE_URL
+AI_MODEL = settings.AI_MODEL
+AI_MODELS_NOTIFY = settings.AI_MODELS_NOTIFY
+AI_MODEL_CELEBRATION = settings.AI_MODEL_CELEBRATION
+
+PROBLEMS_SYNC_INTERVAL_SECONDS = settings.PROBLEMS_SYNC_INTERVAL_SECONDS
+HEALTHCHECK_INTERVAL_SECONDS = settings.HEALTHCHECK_INTERVAL_SECONDS
+
+LOG_LEVEL = settings.LOG_LEVEL
+LOG_FILE = settings.LOG_FILE
+LOG_MAX_BYTES = settings.LOG_MAX_BYTES
+LOG_BACKUP_COUNT = settings.LOG_BACKUP_COUNT
@@ -1,20 +1,24 @@
 from __future__ import annotations
 
+import asyncio
 import pathlib
+import weakref
+from contextlib import asynccontextmanager
 from datetime import date, datetime
-from typing import Any, Iterable
+from typing import Any, AsyncIterator, Iterable
 
 import aiosqlite
 
 from config import INITIAL_FETCH_EPOCH
 from utils import now_utc, week_start_jst
 SCHEMA_PATH = pathlib.Path(__file__).with_name("schema.sql")
+# sqlite3 reuses prepared statements keyed by SQL text; keep every query in this module resident
+STATEMENT_CACHE_SIZE = 256
 
 
-def _dt_to_str(value: datetime | None) -> str | None:
-    if value is None:
-        return None
-    if isinstance(value, str):
+def _dt_to_str(value: datetime | str | None) -> str | None:
+    # no memoization: aware datetimes for the same instant compare equal across timezones
+    if value is None or type(value) is str:
         return value
     return value.isoformat()
 
@@ -44,13 +48,63 @@ def _current_week_start_epoch() -> int:
 
 
 async def create_db(path: str) -> aiosqlite.Connection:
-    conn = await aiosqlite.connect(path)
+    conn = await aiosqlite.connect(path, cached_statements=STATEMENT_CACHE_SIZE)
     conn.row_factory = aiosqlite.Row
+    # WAL keeps <db>-wal / <db>-shm files next to the database; back them up together
     await conn.execute("PRAGMA journal_mode=WAL;")
+    await conn.execute("PRAGMA synchronous=NORMAL;")
+    await conn.execute("PRAGMA temp_store=MEMORY;")
+    await conn.execute("PRAGMA mmap_size=134217728;")
+    await conn.execute("PRAGMA cache_size=-20000;")
     await conn.execute("PRAGMA foreign_keys=ON;")
+    await conn.execute("PRAGMA busy_timeout=5000;")
     return conn
 
 
+async def create_read_db(path: str) -> aiosqlite.Connection:
+    # read-only second connection: aiosqlite runs it on its own thread, so under WAL
+    # SELECTs no longer queue behind writes on the main connection
+    uri = f"{pathlib.Path(path).resolve().as_uri()}?mode=ro"
+    conn = await aiosqlite.connect(uri, uri=True, cached_statements=STATEMENT_CACHE_SIZE)
+    conn.row_factory = aiosqlite.Row
+    await conn.execute("PRAGMA temp_store=MEMORY;")
+    await conn.execute("PRAGMA mmap_size=134217728;")
+    await conn.execute("PRAGMA cache_size=-20000;")
+    await conn.execute("PRAGMA busy_timeout=5000;")
+    return conn
+
+
+_tx_locks: weakref.WeakKeyDictionary[aiosqlite.Connection, asyncio.Lock] = weakref.WeakKeyDictionary()
+_tx_owners: weakref.WeakKeyDictionary[aiosqlite.Connection, asyncio.Task] = weakref.WeakKeyDictionary()
+
+
+@asynccontextmanager
+async def transaction(conn: aiosqlite.Connection) -> AsyncIterator[aiosqlite.Connection]:
+    # every write helper goes through here, so writers on one connection are serialized by the lock;
+    # nested blocks in the owning task join the outer transaction
+    if _tx_owners.get(conn) is asyncio.current_task():
+        yield conn
+        return
+    lock = _tx_locks.get(conn)
+    if lock is None:
+        lock = _tx_locks[conn] = asyncio.Lock()
+    async with lock:
+        if conn.in_transaction:
+            # a raw DML statement outside the helpers left sqlite3's implicit transaction open
+            await conn.commit()
+        await conn.execute("BEGIN IMMEDIATE")
+        _tx_owners[conn] = asyncio.current_task()
+        try:
+            yield conn
+        except BaseException:
+            await conn.rollback()
+            raise
+        else:
+            await conn.commit()
+        finally:
+            _tx_owners.pop(conn, None)
+
+
 async def _ensure_settings_columns(
     conn: aiosqlite.Connection,
     columns: dict[str, str],
@@ -81,11 +135,11 @@ async def init_db(conn: aiosqlite.Connection) -> None:
 
 
 async def ensure_settings(conn: aiosqlite.Connection, guild_id: int) -> None:
-    await conn.execute(
-        "insert into settings (guild_id) values (?) on conflict do nothing",
-        (guild_id,),
-    )
-    await conn.commit()
+    async with transaction(conn):
+        await conn.execute(
+            "insert into settings (guild_id) values (?) on conflict do nothing",
+            (guild_id,),
+        )
 
 
 async def get_settings(conn: aiosqlite.Connection, guild_id: int) -> dict[str, Any]:
@@ -95,43 +149,42 @@ async def get_settings(conn: aiosqlite.Connection, guild_id: int) -> dict[str, A
 
 
 async def update_setting(conn: aiosqlite.Connection, guild_id: int, field: str, value: Any) -> None:
-    await conn.execute(
-        f"update settings set {field}=? where guild_id=?",
-        (value, guild_id),
-    )
-    await conn.commit()
+    async with transaction(conn):
+        await conn.execute(
+            f"update settings set {field}=? where guild_id=?",
+            (value, guild_id),
+        )
 
 
 async def upsert_user(conn: aiosqlite.Connection, discord_id: int, atcoder_id: str) -> None:
     atcoder_id = atcoder_id.strip()
-    await conn.execute(
-        """
-        insert into users (discord_id, atcoder_id)
-        values (?, ?)
-        on conflict (discord_id) do update set atcoder_id=excluded.atcoder_id, is_active=1
-        """,
-        (discord_id, atcoder_id),
-    )
-    await conn.execute(
-        "insert into user_fetch_state (discord_id, last_checked_epoch) values (?, ?) on conflict do nothing",
-        (discord_id, _current_week_start_epoch()),
-    )
-    await conn.execute(
-        "insert into streaks (discord_id) values (?) on conflict do nothing",
-        (discord_id,),
-    )
-    await conn.commit()
+    async with transaction(conn):
+        await conn.execute(
+            """
+            insert into users (discord_id, atcoder_id)
+            values (?, ?)
+            on conflict (discord_id) do update set atcoder_id=excluded.atcoder_id, is_active=1
+            """,
+            (discord_id, atcoder_id),
+        )
+        await conn.execute(
+            "insert into user_fetch_state (discord_id, last_checked_epoch) values (?, ?) on conflict do nothing",
+            (discord_id, _current_week_start_epoch()),
+        )
+        await conn.execute(
+            "insert into streaks (discord_id) values (?) on conflict do nothing",
+            (discord_id,),
+        )
 
 
 async def deactivate_user(conn: aiosqlite.Connection, discord_id: int) -> None:
-    await conn.execute("update users set is_active=0 where discord_id=?", (discord_id,))
-    await conn.commit()
+    async with transaction(conn):
+        await conn.execute("update users set is_active=0 where discord_id=?", (discord_id,))
 
 
-async def get_active_users(conn: aiosqlite.Connection) -> list[dict[str, Any]]:
+async def get_active_users(conn: aiosqlite.Connection) -> list[aiosqlite.Row]:
     cursor = await conn.execute("select discord_id, atcoder_id from users where is_active=1")
-    rows = await cursor.fetchall()
-    return [dict(r) for r in rows]
+    return list(await cursor.fetchall())
 
 
 async def get_user_atcoder_id(conn: aiosqlite.Connection, discord_id: int) -> str | None:
@@ -147,41 +200,82 @@ async def get_fetch_state(conn: aiosqlite.Connection, discord_id: int) -> dict[s
 
 
 async def update_fetch_state(conn: aiosqlite.Connection, discord_id: int, last_epoch: int, last_submission_id: int | None) -> None:
-    await conn.execute(
-        """
-        insert into user_fetch_state (discord_id, last_checked_epoch, last_submission_id)
-        values (?, ?, ?)
-        on conflict (discord_id) do update set last_checked_epoch=excluded.last_checked_epoch,
-                                              last_submission_id=excluded.last_submission_id
-        """,
-        (discord_id, last_epoch, last_submission_id),
-    )
-    await conn.commit()
+    async with transaction(conn):
+        await conn.execute(
+            """
+            insert into user_fetch_state (discord_id, last_checked_epoch, last_submission_id)
+            values (?, ?, ?)
+            on conflict (discord_id) do update set last_checked_epoch=excluded.last_checked_epoch,
+                                                  last_submission_id=excluded.last_submission_id
+            """,
+            (discord_id, last_epoch, last_submission_id),
+        )
 
 
 async def upsert_problems(conn: aiosqlite.Connection, problems: Iterable[dict[str, Any]]) -> None:
-    await conn.executemany(
-        """
-        insert into problems (problem_id, contest_id, title, difficulty_raw, difficulty)
-        values (?, ?, ?, ?, ?)
-        on conflict (problem_id) do update set
-          contest_id=excluded.contest_id,
-          title=excluded.title,
-          difficulty_raw=excluded.difficulty_raw,
-          difficulty=excluded.difficulty
-        """,
-        [
-            (
-                p["problem_id"],
-                p.get("contest_id"),
-                p.get("title"),
-                p.get("difficulty_raw"),
-                p.get("difficulty"),
-            )
-            for p in problems
-        ],
+    get = dict.get
+    # lazily consumed by executemany in the worker thread; no intermediate list
+    rows = (
+        (
+            p["problem_id"],
+            get(p, "contest_id"),
+            get(p, "title"),
+            get(p, "difficulty_raw"),
+            get(p, "difficulty"),
+        )
+        for p in problems
     )
-    await conn.commit()
+    async with transaction(conn):
+        await conn.executemany(
+            """
+            insert into problems (problem_id, contest_id, title, difficulty_raw, difficulty)
+            values (?, ?, ?, ?, ?)
+            on conflict (problem_id) do update set
+              contest_id=excluded.contest_id,
+              title=excluded.title,
+              difficulty_raw=excluded.difficulty_raw,
+              difficulty=excluded.difficulty
+            """,
+            rows,
+        )
+
+
+async def get_http_validators(conn: aiosqlite.Connection, url: str) -> dict[str, Any] | None:
+    # etag/last_modified only; the cached body can be several MB
+    cursor = await conn.execute(
+        "select etag, last_modified from http_cache where url=?",
+        (url,),
+    )
+    row = await cursor.fetchone()
+    return dict(row) if row else None
+
+
+async def get_http_cache_body(conn: aiosqlite.Connection, url: str) -> bytes | None:
+    cursor = await conn.execute("select body from http_cache where url=?", (url,))
+    row = await cursor.fetchone()
+    return row["body"] if row else None
+
+
+async def store_http_cache(
+    conn: aiosqlite.Connection,
+    url: str,
+    etag: str | None,
+    last_modified: str | None,
+    body: bytes,
+) -> None:
+    async with transaction(conn):
+        await conn.execute(
+            """
+            insert into http_cache (url, etag, last_modified, body, updated_at)
+            values (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            on conflict (url) do update set
+              etag=excluded.etag,
+              last_modified=excluded.last_modified,
+              body=excluded.body,
+              updated_at=CURRENT_TIMESTAMP
+            """,
+            (url, etag, last_modified, body),
+        )
 
 
 async def get_problem(conn: aiosqlite.Connection, problem_id: str) -> dict[str, Any] | None:
@@ -190,16 +284,61 @@ async def get_problem(conn: aiosqlite.Connection, problem_id: str) -> dict[str,
     return dict(row) if row else None
 
 
-async def upsert_rating(conn: aiosqlite.Connection, discord_id: int, rating: int) -> None:
-    await conn.execute(
+async def get_ac_context(conn: aiosqlite.Connection, discord_id: int, problem_id: str) -> dict[str, Any]:
+    # problem, rating and streak for scoring one AC; same defaults as the single-table getters
+    cursor = await conn.execute(
         """
-        insert into ratings (discord_id, rating, updated_at)
-        values (?, ?, CURRENT_TIMESTAMP)
-        on conflict (discord_id) do update set rating=excluded.rating, updated_at=CURRENT_TIMESTAMP
+        select
+          p.problem_id, p.contest_id, p.title, p.difficulty_raw, p.difficulty,
+          r.rating, s.current_streak, s.last_ac_date
+        from (select 1)
+        left join problems p on p.problem_id=?
+        left join ratings r on r.discord_id=?
+        left join streaks s on s.discord_id=?
         """,
-        (discord_id, rating),
+        (problem_id, discord_id, discord_id),
     )
-    await conn.commit()
+    row = await cursor.fetchone()
+    problem = None
+    if row["problem_id"] is not None:
+        problem = {
+            "problem_id": row["problem_id"],
+            "contest_id": row["contest_id"],
+            "title": row["title"],
+            "difficulty_raw": row["difficulty_raw"],
+            "difficulty": row["difficulty"],
+        }
+    return {
+        "problem": problem,
+        "rating": int(row["rating"]) if row["rating"] is not None else 0,
+        "current_streak": row["current_streak"] or 0,
+        "last_ac_date": _str_to_date(row["last_ac_date"]),
+    }
+
+
+async def upsert_rating(conn: aiosqlite.Connection, discord_id: int, rating: int) -> None:
+    async with transaction(conn):
+        await conn.execute(
+            """
+            insert into ratings (discord_id, rating, updated_at)
+            values (?, ?, CURRENT_TIMESTAMP)
+            on conflict (discord_id) do update set rating=excluded.rating, updated_at=CURRENT_TIMESTAMP
+            """,
+            (discord_id, rating),
+        )
+
+
+async def upsert_ratings(conn: aiosqlite.Connection, rows: Iterable[tuple[int, int]]) -> None:
+    # (discord_id, rating) pairs from one rating sync, written in a single transaction
+    async with transaction(conn):
+        await conn.executemany(
+            """
+            insert into ratings (discord_id, rating, updated_at)
+            values (?, ?, CURRENT_TIMESTAMP)
+            on conflict (discord_id) do update set rating=excluded.rating, updated_at=CURRENT_TIMESTAMP
+            """,
+            rows,
+        )
 
 
 async def get_rating(conn: aiosqlite.Connection, discord_id: int) -> int:
@@ -208,6 +347,22 @@ async def get_rating(conn: aiosqlite.Connection, discord_id: int) -> int:
     return int(row["rating"]) if row and row["rating"] is not None else 0
 
 
+async def get_profile(conn: aiosqlite.Connection, discord_id: int) -> dict[str, Any] | None:
+    # atcoder_id, rating and streak in one round trip; None when the user never registered
+    cursor = await conn.execute(
+        """
+        select u.atcoder_id, coalesce(r.rating, 0) as rating, coalesce(s.current_streak, 0) as current_streak
+        from users u
+        left join ratings r on r.discord_id = u.discord_id
+        left join streaks s on s.discord_id = u.discord_id
+        where u.discord_id=?
+        """,
+        (discord_id,),
+    )
+    row = await cursor.fetchone()
+    return dict(row) if row else None
+
+
 async def get_last_ac(conn: aiosqlite.Connection, discord_id: int, problem_id: str) -> datetime | None:
     cursor = await conn.execute(
         "select last_ac_at from user_problem_last_ac where discord_id=? and problem_id=?",
@@ -218,15 +373,15 @@ async def get_last_ac(conn: aiosqlite.Connection, discord_id: int, problem_id: s
 
 
 async def upsert_last_ac(conn: aiosqlite.Connection, discord_id: int, problem_id: str, last_ac_at: datetime) -> None:
-    await conn.execute(
-        """
-        insert into user_problem_last_ac (discord_id, problem_id, last_ac_at)
-        values (?, ?, ?)
-        on conflict (discord_id, problem_id) do update set last_ac_at=excluded.last_ac_at
-        """,
-        (discord_id, problem_id, _dt_to_str(last_ac_at)),
-    )
-    await conn.commit()
+    async with transaction(conn):
+        await conn.execute(
+            """
+            insert into user_problem_last_ac (discord_id, problem_id, last_ac_at)
+            values (?, ?, ?)
+            on conflict (discord_id, problem_id) do update set last_ac_at=excluded.last_ac_at
+            """,
+            (discord_id, problem_id, _dt_to_str(last_ac_at)),
+        )
 
 
 async def get_streak(conn: aiosqlite.Connection, discord_id: int) -> dict[str, Any]:
@@ -244,38 +399,39 @@ async def get_streak(conn: aiosqlite.Connection, discord_id: int) -> dict[str, A
 
 
 async def update_streak(conn: aiosqlite.Connection, discord_id: int, current_streak: int, last_ac_date: date) -> None:
-    await conn.execute(
-        """
-        insert into streaks (discord_id, current_streak, last_ac_date)
-        values (?, ?, ?)
-        on conflict (discord_id) do update set current_streak=excluded.current_streak,
-                                              last_ac_date=excluded.last_ac_date
-        """,
-        (discord_id, current_streak, _date_to_str(last_ac_date)),
-    )
-    await conn.commit()
+    async with transaction(conn):
+        await conn.execute(
+            """
+            insert into streaks (discord_id, current_streak, last_ac_date)
+            values (?, ?, ?)
+            on conflict (discord_id) do update set current_streak=excluded.current_streak,
+                                                  last_ac_date=excluded.last_ac_date
+            """,
+            (discord_id, current_streak, _date_to_str(last_ac_date)),
+        )
 
 
 async def add_weekly_score(
     conn: aiosqlite.Connection,
-    week_start: datetime,
+    week_start: datetime | str,
     discord_id: int,
     score_delta: int,
 ) -> None:
-    await conn.execute(
-        """
-        insert into weekly_scores (week_start, discord_id, score, score_updated_at)
-        values (?, ?, ?, CURRENT_TIMESTAMP)
-        on conflict (week_start, discord_id) do update
-          set score = weekly_scores.score + excluded.score,
-              score_updated_at = CURRENT_TIMESTAMP
-        """,
-        (_dt_to_str(week_start), discord_id, score_delta),
-    )
-    await conn.commit()
-
-
-async def get_weekly_scores(conn: aiosqlite.Connection, week_start: datetime) -> list[dict[str, Any]]:
+    async with transaction(conn):
+        await conn.execute(
+            """
+            insert into weekly_scores (week_start, discord_id, score, score_updated_at)
+            values (?, ?, ?, CURRENT_TIMESTAMP)
+            on conflict (week_start, discord_id) do update
+              set score = weekly_scores.score + excluded.score,
+                  score_updated_at = CURRENT_TIMESTAMP
+            """,
+            (_dt_to_str(week_start), discord_id, score_delta),
+        )
+
+
+async def get_weekly_scores(conn: aiosqlite.Connection, week_start: datetime | str) -> list[dict[str, Any]]:
+    # served by weekly_scores_rank_idx (no sort step)
     cursor = await conn.execute(
         """
         select w.discord_id, w.score, w.score_updated_at, u.atcoder_id
@@ -287,10 +443,36 @@ async def get_weekly_scores(conn: aiosqlite.Connection, week_start: datetime) ->
         (_dt_to_str(week_start),),
     )
     rows = await cursor.fetchall()
+    # dict(Row) is C-level on both sides and beats a Python dict row_factory
     return [dict(r) for r in rows]
 
 
-async def get_weekly_score(conn: aiosqlite.Connection, week_start: datetime, discord_id: int) -> int:
+async def get_weekly_scores_multi(
+    conn: aiosqlite.Connection,
+    week_starts: list[datetime | str],
+) -> list[list[dict[str, Any]]]:
+    # one round trip for several weeks; result lists follow the order of week_starts
+    keys = [_dt_to_str(ws) for ws in week_starts]
+    if not keys:
+        return []
+    placeholders = ", ".join("?" * len(keys))
+    cursor = await conn.execute(
+        f"""
+        select w.week_start, w.discord_id, w.score, w.score_updated_at, u.atcoder_id
+        from weekly_scores w
+        left join users u on w.discord_id = u.discord_id
+        where w.week_start in ({placeholders})
+        order by w.week_start, w.score desc, w.score_updated_at asc
+        """,
+        keys,
+    )
+    grouped: dict[str, list[dict[str, Any]]] = {key: [] for key in keys}
+    for r in await cursor.fetchall():
+        grouped[r["week_start"]].append(dict(r))
+    return [grouped[key] for key in keys]
+
+
+async def get_weekly_score(conn: aiosqlite.Connection, week_start: datetime | str, discord_id: int) -> int:
     cursor = await conn.execute(
         "select score from weekly_scores where week_start=? and discord_id=?",
         (_dt_to_str(week_start), discord_id),
@@ -301,23 +483,23 @@ async def get_weekly_score(conn: aiosqlite.Connection, week_start: datetime, dis
 
 async def upsert_weekly_report(
     conn: aiosqlite.Connection,
-    week_start: datetime,
+    week_start: datetime | str,
     reset_time: datetime,
     report_text: str,
     ai_comment: str | None,
 ) -> None:
-    await conn.execute(
-        """
-        insert into weekly_reports (week_start, reset_time, report_text, ai_comment)
-        values (?, ?, ?, ?)
-        on conflict (week_start) do update
-          set reset_time=excluded.reset_time,
-              report_text=excluded.report_text,
-              ai_comment=excluded.ai_comment
-        """,
-        (_dt_to_str(week_start), _dt_to_str(reset_time), report_text, ai_comment),
-    )
-    await conn.commit()
+    async with transaction(conn):
+        await conn.execute(
+            """
+            insert into weekly_reports (week_start, reset_time, report_text, ai_comment)
+            values (?, ?, ?, ?)
+            on conflict (week_start) do update
+              set reset_time=excluded.reset_time,
+                  report_text=excluded.report_text,
+                  ai_comment=excluded.ai_comment
+            """,
+            (_dt_to_str(week_start), _dt_to_str(reset_time), report_text, ai_comment),
+        )
 
 
 async def get_recent_weekly_reports(conn: aiosqlite.Connection, limit: int = 5) -> list[dict[str, Any]]:
@@ -345,14 +527,14 @@ async def insert_notify_history(
     score: int,
     message_text: str,
 ) -> None:
-    await conn.execute(
-        """
-        insert into notify_history (discord_id, atcoder_id, problem_id, difficulty, rating, score, message_text)
-        values (?, ?, ?, ?, ?, ?, ?)
-        """,
-        (discord_id, atcoder_id, problem_id, difficulty, rating, score, message_text),
-    )
-    await conn.commit()
+    async with transaction(conn):
+        await conn.execute(
+            """
+            insert into notify_history (discord_id, atcoder_id, problem_id, difficulty, rating, score, message_text)
+            values (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (discord_id, atcoder_id, problem_id, difficulty, rating, score, message_text),
+        )
 
 
 async def get_recent_notify_history(conn: aiosqlite.Connection, limit: int = 5) -> list[dict[str, Any]]:
@@ -378,26 +560,46 @@ async def insert_submission(
     streak_mult: float,
     score_final: int,
 ) -> None:
-    await conn.execute(
-        """
-        insert into submissions (discord_id, problem_id, submitted_at, score_base, streak_mult, score_final)
-        values (?, ?, ?, ?, ?, ?)
-        """,
-        (discord_id, problem_id, _dt_to_str(submitted_at), score_base, streak_mult, score_final),
-    )
-    await conn.commit()
+    async with transaction(conn):
+        await conn.execute(
+            """
+            insert into submissions (discord_id, problem_id, submitted_at, score_base, streak_mult, score_final)
+            values (?, ?, ?, ?, ?, ?)
+            """,
+            (discord_id, problem_id, _dt_to_str(submitted_at), score_base, streak_mult, score_final),
+        )
+
+
+async def record_accept(
+    conn: aiosqlite.Connection,
+    *,
+    discord_id: int,
+    problem_id: str,
+    submitted_at: datetime,
+    week_start: datetime | str,
+    score_base: int,
+    streak_mult: float,
+    score_final: int,
+    current_streak: int,
+    last_ac_date: date,
+) -> None:
+    async with transaction(conn):
+        await update_streak(conn, discord_id, current_streak, last_ac_date)
+        await insert_submission(conn, discord_id, problem_id, submitted_at, score_base, streak_mult, score_final)
+        await add_weekly_score(conn, week_start, discord_id, score_final)
+        await upsert_last_ac(conn, discord_id, problem_id, submitted_at)
 
 
 async def store_role_color(conn: aiosqlite.Connection, guild_id: int, color_key: str, role_id: int) -> None:
-    await conn.execute(
-        """
-        insert into role_colors (guild_id, color_key, role_id)
-        values (?, ?, ?)
-        on conflict (guild_id, color_key) do update set role_id=excluded.role_id
-        """,
-        (guild_id, color_key, role_id),
-    )
-    await conn.commit()
+    async with transaction(conn):
+        await conn.execute(
+            """
+            insert into role_colors (guild_id, color_key, role_id)
+            values (?, ?, ?)
+            on conflict (guild_id, color_key) do update set role_id=excluded.role_id
+            """,
+            (guild_id, color_key, role_id),
+        )
 
 
 async def get_role_colors(conn: aiosqlite.Connection, guild_id: int) -> dict[str, int]:
@@ -407,43 +609,42 @@ async def get_role_colors(conn: aiosqlite.Connection, guild_id: int) -> dict[str
 
 
 async def upsert_weekly_goal(conn: aiosqlite.Connection, discord_id: int, week_start: datetime, target_score: int) -> None:
-    await conn.execute(
-        """
-        insert into weekly_goals (discord_id, week_start, target_score)
-        values (?, ?, ?)
-        on conflict (discord_id, week_start) do update set
-          target_score=excluded.target_score,
-          notified_25=0,
-          notified_50=0,
-          notified_75=0,
-          notified_100=0
-        """,
-        (discord_id, _dt_to_str(week_start), target_score),
-    )
-    await conn.commit()
-
-
-async def get_weekly_goal(conn: aiosqlite.Connection, discord_id: int, week_start: datetime) -> dict[str, Any] | None:
+    async with transaction(conn):
+        await conn.execute(
+            """
+            insert into weekly_goals (discord_id, week_start, target_score)
+            values (?, ?, ?)
+            on conflict (discord_id, week_start) do update set
+              target_score=excluded.target_score,
+              notified_25=0,
+              notified_50=0,
+              notified_75=0,
+              notified_100=0
+            """,
+            (discord_id, _dt_to_str(week_start), target_score),
+        )
+
+
+async def get_weekly_goal(conn: aiosqlite.Connection, discord_id: int, week_start: datetime) -> aiosqlite.Row | None:
     cursor = await conn.execute(
         "select * from weekly_goals where discord_id=? and week_start=?",
         (discord_id, _dt_to_str(week_start)),
     )
-    row = await cursor.fetchone()
-    return dict(row) if row else None
+    return await cursor.fetchone()
 
 
 async def delete_weekly_goal(conn: aiosqlite.Connection, discord_id: int, week_start: datetime) -> None:
-    await conn.execute(
-        "delete from weekly_goals where discord_id=? and week_start=?",
-        (discord_id, _dt_to_str(week_start)),
-    )
-    await conn.commit()
+    async with transaction(conn):
+        await conn.execute(
+            "delete from weekly_goals where discord_id=? and week_start=?",
+            (discord_id, _dt_to_str(week_start)),
+        )
 
 
 async def update_goal_notification(conn: aiosqlite.Connection, discord_id: int, week_start: datetime, milestone: int) -> None:
     field = f"notified_{milestone}"
-    await conn.execute(
-        f"update weekly_goals set {field}=1 where discord_id=? and week_start=?",
-        (discord_id, _dt_to_str(week_start)),
-    )
-    await conn.commit()
+    async with transaction(conn):
+        await conn.execute(
+            f"update weekly_goals set {field}=1 where discord_id=? and week_start=?",
+            (discord_id, _dt_to_str(week_start)),
+        )
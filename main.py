@@ -1,19 +1,25 @@
 from __future__ import annotations
 
 import asyncio
+import bisect
 import logging
 import os
 import random
+import time
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta, timezone
+from operator import itemgetter
 
 import aiohttp
+import aiosqlite
 import discord
+import orjson
 from discord import app_commands
 from discord.ext import commands
 
 import atcoder_api
 import db
-from ai import generate_message
+from ai import close_client, generate_message
 from config import (
     AI_ENABLED,
     AI_MODEL_CELEBRATION,
@@ -31,16 +37,17 @@ from config import (
     SQLITE_PATH,
 )
 from scoring import base_score, streak_multiplier
-from templates import NOTIFY_TEMPLATES
+from templates import AC_AI_PROMPT, GOAL_AI_PROMPT, NOTIFY_TEMPLATES, WEEKLY_RESET_AI_PROMPT
 from utils import (
-    COLOR_EMOJI,
     ROLE_LABELS,
+    color_emoji,
     color_key,
+    current_week_start,
     display_difficulty,
     next_week_start_jst,
     now_utc,
     to_jst,
-    week_start_jst,
+    week_start_of_jst,
 )
 
 
@@ -80,6 +87,7 @@ intents.members = True
 bot = commands.Bot(command_prefix="!", intents=intents)
 
 pool = None
+read_pool = None
 session: aiohttp.ClientSession | None = None
 started_at = now_utc()
 last_poll_at: datetime | None = None
@@ -96,16 +104,138 @@ COLOR_VALUES = {
     "orange": (255, 184, 54),
     "red": (255, 103, 103),
 }
+COLOR_ROLE_COLOURS = {key: discord.Colour.from_rgb(*rgb) for key, rgb in COLOR_VALUES.items()}
+
+
+SETTINGS_CACHE_TTL_SECONDS = 30.0
+USER_FANOUT_CONCURRENCY = 8
+ROLE_EDIT_CONCURRENCY = 4
+RANK_UPDATE_MIN_INTERVAL_SECONDS = 5
+_rank_dirty = asyncio.Event()
+RANK_CACHE_TTL_SECONDS = 60
+_rank_cache: dict[tuple[int, datetime], tuple[float, discord.Embed]] = {}
+# last embed written to each guild's rank message; identical refreshes skip the Discord edit
+_last_rank_embed: dict[int, tuple[int, int, dict]] = {}
+_settings_cache: dict[int, tuple[float, dict]] = {}
+_role_colors_cache: dict[int, tuple[float, dict[str, int]]] = {}
+LAST_AC_CACHE_SIZE = 10000
+_last_ac_cache: OrderedDict[tuple[int, str], datetime | None] = OrderedDict()
+GOAL_CACHE_TTL_SECONDS = 30.0
+_goal_cache: dict[tuple[int, datetime], tuple[float, aiosqlite.Row | None]] = {}
+WEEKLY_SCORE_CACHE_TTL_SECONDS = 60.0
+_weekly_score_cache: dict[tuple[int, datetime], tuple[float, int]] = {}
+_bg_tasks: set[asyncio.Task] = set()
+MENU_CLICK_DEBOUNCE_SECONDS = 2.0
+_menu_clicks: dict[tuple[int, str], float] = {}
+
+RECENT_NOTIFY_LIMIT = 5
+_recent_notify_texts: deque[str] | None = None
+
+
+async def get_settings_cached(guild_id: int, ttl: float = SETTINGS_CACHE_TTL_SECONDS) -> dict:
+    # settings only change through admin commands, which invalidate this cache
+    cached = _settings_cache.get(guild_id)
+    if cached and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    settings = await db.get_settings(reader(), guild_id)
+    _settings_cache[guild_id] = (time.monotonic(), settings)
+    return settings
+
+
+async def get_role_colors_cached(guild_id: int, ttl: float = SETTINGS_CACHE_TTL_SECONDS) -> dict[str, int]:
+    cached = _role_colors_cache.get(guild_id)
+    if cached and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    stored = await db.get_role_colors(reader(), guild_id)
+    _role_colors_cache[guild_id] = (time.monotonic(), stored)
+    return stored
+
+
+def _remember_last_ac(key: tuple[int, str], last_ac_at: datetime | None) -> None:
+    _last_ac_cache[key] = last_ac_at
+    _last_ac_cache.move_to_end(key)
+    if len(_last_ac_cache) > LAST_AC_CACHE_SIZE:
+        _last_ac_cache.popitem(last=False)
+
+
+async def get_last_ac_cached(discord_id: int, problem_id: str) -> datetime | None:
+    # rows in user_problem_last_ac are only written through handle_ac, which refreshes this cache
+    key = (discord_id, problem_id)
+    if key in _last_ac_cache:
+        _last_ac_cache.move_to_end(key)
+        return _last_ac_cache[key]
+    last_ac_at = await db.get_last_ac(reader(), discord_id, problem_id)
+    _remember_last_ac(key, last_ac_at)
+    return last_ac_at
+
+
+async def get_recent_notify_texts() -> list[str]:
+    # newest first, mirroring the last RECENT_NOTIFY_LIMIT rows of notify_history; seeded once from the DB
+    global _recent_notify_texts
+    if _recent_notify_texts is None:
+        rows = await db.get_recent_notify_history(reader(), limit=RECENT_NOTIFY_LIMIT)
+        _recent_notify_texts = deque((row.get("message_text") or "" for row in rows), maxlen=RECENT_NOTIFY_LIMIT)
+    return list(_recent_notify_texts)
+
+
+def remember_notify_text(text: str) -> None:
+    if _recent_notify_texts is not None:
+        _recent_notify_texts.appendleft(text)
+
+
+async def get_weekly_goal_cached(discord_id: int, week_start: datetime) -> aiosqlite.Row | None:
+    # checked on every AC; most users have no goal, so cached misses save the most
+    key = (discord_id, week_start)
+    cached = _goal_cache.get(key)
+    if cached and time.monotonic() - cached[0] < GOAL_CACHE_TTL_SECONDS:
+        return cached[1]
+    goal = await db.get_weekly_goal(reader(), discord_id, week_start)
+    _goal_cache[key] = (time.monotonic(), goal)
+    return goal
+
+
+def invalidate_weekly_goal(discord_id: int, week_start: datetime) -> None:
+    _goal_cache.pop((discord_id, week_start), None)
+
+
+async def get_weekly_score_cached(week_start: datetime, discord_id: int) -> int:
+    # weekly_scores only grows through handle_ac, which invalidates the key after record_accept
+    key = (discord_id, week_start)
+    cached = _weekly_score_cache.get(key)
+    if cached and time.monotonic() - cached[0] < WEEKLY_SCORE_CACHE_TTL_SECONDS:
+        return cached[1]
+    score = await db.get_weekly_score(reader(), week_start, discord_id)
+    _weekly_score_cache[key] = (time.monotonic(), score)
+    return score
+
+
+async def update_guild_setting(guild_id: int, field: str, value) -> None:
+    await db.update_setting(pool, guild_id, field, value)
+    _settings_cache.pop(guild_id, None)
+
+
+async def store_role_color(guild_id: int, key: str, role_id: int) -> None:
+    await db.store_role_color(pool, guild_id, key, role_id)
+    _role_colors_cache.pop(guild_id, None)
+
+
+def reader() -> aiosqlite.Connection | None:
+    # SELECTs go to the read-only connection once it is open; writes always use pool
+    return read_pool or pool
+
+
+def home_guild() -> discord.Guild | None:
+    # resolve on each call: discord.py swaps the Guild object when it becomes unavailable and returns
+    return bot.get_guild(GUILD_ID) if GUILD_ID else None
 
 
 def color_from_key(key: str) -> discord.Colour:
-    r, g, b = COLOR_VALUES[key]
-    return discord.Colour.from_rgb(r, g, b)
+    return COLOR_ROLE_COLOURS[key]
 
 
 @bot.event
 async def on_ready() -> None:
-    global pool, session
+    global pool, read_pool, session
     if not SQLITE_PATH:
         raise RuntimeError("SQLITE_PATH is required")
     if not DISCORD_TOKEN:
@@ -114,14 +244,19 @@ async def on_ready() -> None:
     try:
         pool = await db.create_db(SQLITE_PATH)
         await db.init_db(pool)
+        read_pool = await db.create_read_db(SQLITE_PATH)
     except Exception:
         logger.exception("DB init failed")
         raise
 
-    guild = bot.get_guild(GUILD_ID) if GUILD_ID else None
+    guild = home_guild()
     if guild:
         await db.ensure_settings(pool, guild.id)
-    session = aiohttp.ClientSession()
+    # limit_per_host matches the per-user fetch semaphore in atcoder_api; kenkoooo is a volunteer-run host
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=32, limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=30),
+        timeout=aiohttp.ClientTimeout(total=30),
+    )
 
     await sync_problems()
     if guild:
@@ -137,6 +272,7 @@ async def on_ready() -> None:
     bot.loop.create_task(weekly_loop())
     bot.loop.create_task(problems_sync_loop())
     bot.loop.create_task(healthcheck_loop())
+    bot.loop.create_task(rank_update_loop())
     logger.info("Bot ready")
 
 
@@ -144,6 +280,9 @@ async def on_ready() -> None:
 async def on_close() -> None:
     if session:
         await session.close()
+    await close_client()
+    if read_pool:
+        await read_pool.close()
     if pool:
         await pool.close()
 
@@ -160,14 +299,26 @@ async def on_app_command_error(interaction: discord.Interaction, error: app_comm
         pass
 
 
-async def sync_problems() -> None:
-    if not session or not pool:
-        return
-    try:
-        models = await atcoder_api.fetch_problem_models(session)
-    except Exception:
-        logger.exception("failed to fetch problem models")
-        return
+async def fetch_with_validators(url: str) -> tuple[bytes | None, str | None, str | None]:
+    # only the validators are read up front; body is None when the server answers 304
+    validators = await db.get_http_validators(reader(), url) or {}
+    return await atcoder_api.fetch_conditional(
+        session, url, validators.get("etag"), validators.get("last_modified")
+    )
+
+
+async def _resource_body(url: str, fresh: bytes | None) -> bytes | None:
+    # an unchanged resource loads its cached body only when the other one changed
+    if fresh is not None:
+        return fresh
+    body = await db.get_http_cache_body(reader(), url)
+    if body is None:
+        logger.error("cached body missing for %s", url)
+    return body
+
+
+def _parse_model_map(body: bytes) -> dict[str, float | None] | None:
+    models = orjson.loads(body)
     model_map = {}
     if isinstance(models, dict):
         if "models" in models:
@@ -188,13 +339,13 @@ async def sync_problems() -> None:
                     "unexpected problem models payload (dict keys=%s)",
                     list(models.keys())[:5],
                 )
-                return
+                return None
     if isinstance(models, str):
         logger.error("unexpected problem models payload (string)")
-        return
+        return None
     if not isinstance(models, list):
         logger.error("unexpected problem models payload type: %s", type(models))
-        return
+        return None
 
     if not model_map:
         for m in models:
@@ -204,38 +355,74 @@ async def sync_problems() -> None:
             if not pid:
                 continue
             model_map[pid] = m.get("difficulty")
+    return model_map
+
+
+async def sync_problems() -> None:
+    if not session or not pool:
+        return
     try:
-        problems = await atcoder_api.fetch_problems(session)
+        models_res = await fetch_with_validators(atcoder_api.PROBLEM_MODELS_URL)
+    except Exception:
+        logger.exception("failed to fetch problem models")
+        return
+    try:
+        problems_res = await fetch_with_validators(atcoder_api.PROBLEMS_URL)
     except Exception:
         logger.exception("failed to fetch problems")
         return
-    payload = []
-    for p in problems:
-        problem_id = p.get("id") or p.get("problem_id")
-        if not problem_id:
-            continue
-        raw = model_map.get(problem_id)
-        difficulty = display_difficulty(raw) if raw is not None else None
-        payload.append(
-            {
+    if models_res[0] is None and problems_res[0] is None:
+        logger.info("Problems unchanged (304); skip sync")
+        return
+    # parse one resource at a time so its raw bytes and parsed JSON are released before the next
+    body = await _resource_body(atcoder_api.PROBLEM_MODELS_URL, models_res[0])
+    model_map = _parse_model_map(body) if body is not None else None
+    if model_map is None:
+        return
+    body = await _resource_body(atcoder_api.PROBLEMS_URL, problems_res[0])
+    if body is None:
+        return
+    problems = orjson.loads(body)
+    del body
+    synced = 0
+
+    def iter_payload():
+        # consumed row by row by db.upsert_problems; never held as a full list
+        nonlocal synced
+        for p in problems:
+            problem_id = p.get("id") or p.get("problem_id")
+            if not problem_id:
+                continue
+            raw = model_map.get(problem_id)
+            difficulty = display_difficulty(raw) if raw is not None else None
+            synced += 1
+            yield {
                 "problem_id": problem_id,
                 "contest_id": p.get("contest_id"),
                 "title": p.get("title") or p.get("name"),
                 "difficulty_raw": raw,
                 "difficulty": difficulty,
             }
-        )
+
     try:
-        await db.upsert_problems(pool, payload)
-        logger.info("Problems synced: %d", len(payload))
+        await db.upsert_problems(pool, iter_payload())
+        logger.info("Problems synced: %d", synced)
     except Exception:
         logger.exception("failed to upsert problems")
+        return
+    # store validators only after a successful upsert so a failed sync is retried in full
+    for url, (body, etag, last_modified) in (
+        (atcoder_api.PROBLEM_MODELS_URL, models_res),
+        (atcoder_api.PROBLEMS_URL, problems_res),
+    ):
+        if body is not None:
+            await db.store_http_cache(pool, url, etag, last_modified, body)
 
 
 async def ensure_color_roles(guild: discord.Guild) -> None:
     if not pool:
         return
-    stored = await db.get_role_colors(pool, guild.id)
+    stored = await get_role_colors_cached(guild.id)
     for key, name in ROLE_LABELS.items():
         role_id = stored.get(key)
         role = guild.get_role(role_id) if role_id else None
@@ -246,36 +433,37 @@ async def ensure_color_roles(guild: discord.Guild) -> None:
                 logger.warning("missing permissions to create role %s", name)
                 continue
         if role:
-            await db.store_role_color(pool, guild.id, key, role.id)
+            await store_role_color(guild.id, key, role.id)
 
 
 async def apply_color_role(member: discord.Member, rating: int) -> None:
     if not pool:
         return
     key = color_key(rating)
-    stored = await db.get_role_colors(pool, member.guild.id)
+    stored = await get_role_colors_cached(member.guild.id)
     role_id = stored.get(key)
     if role_id is None:
         await ensure_color_roles(member.guild)
-        stored = await db.get_role_colors(pool, member.guild.id)
+        stored = await get_role_colors_cached(member.guild.id)
         role_id = stored.get(key)
     if role_id is None:
         return
     target = member.guild.get_role(role_id)
     if not target:
         return
+    # member.roles rebuilds a sorted list on every access; snapshot the ids once
+    member_role_ids = {role.id for role in member.roles}
     # remove other color roles
-    remove_roles = []
-    for other_key, other_role_id in stored.items():
-        if other_role_id == role_id:
-            continue
-        role = member.guild.get_role(other_role_id)
-        if role and role in member.roles:
-            remove_roles.append(role)
+    remove_roles = [
+        role
+        for other_role_id in stored.values()
+        if other_role_id != role_id and other_role_id in member_role_ids
+        and (role := member.guild.get_role(other_role_id))
+    ]
     try:
         if remove_roles:
             await member.remove_roles(*remove_roles)
-        if target not in member.roles:
+        if role_id not in member_role_ids:
             await member.add_roles(target)
     except discord.Forbidden:
         logger.warning("missing permissions to update roles for %s", member.id)
@@ -284,26 +472,10 @@ async def apply_color_role(member: discord.Member, rating: int) -> None:
 async def remove_user_roles(member: discord.Member) -> None:
     if not pool:
         return
-    settings = await db.get_settings(pool, member.guild.id)
-    remove_roles = []
-
-    role_weekly_id = settings.get("role_weekly_id")
-    if role_weekly_id:
-        role = member.guild.get_role(role_weekly_id)
-        if role and role in member.roles:
-            remove_roles.append(role)
-
-    role_streak_id = settings.get("role_streak_id")
-    if role_streak_id:
-        role = member.guild.get_role(role_streak_id)
-        if role and role in member.roles:
-            remove_roles.append(role)
-
-    stored = await db.get_role_colors(pool, member.guild.id)
-    for role_id in stored.values():
-        role = member.guild.get_role(role_id)
-        if role and role in member.roles:
-            remove_roles.append(role)
+    settings = await get_settings_cached(member.guild.id)
+    stored = await get_role_colors_cached(member.guild.id)
+    managed_ids = {settings.get("role_weekly_id"), settings.get("role_streak_id"), *stored.values()}
+    remove_roles = [role for role in member.roles if role.id in managed_ids]
 
     if not remove_roles:
         return
@@ -313,6 +485,19 @@ async def remove_user_roles(member: discord.Member) -> None:
         logger.warning("missing permissions to remove roles for %s", member.id)
 
 
+async def deactivate_member(discord_id: int, member: discord.Member | None) -> None:
+    # the row update and the role removal don't depend on each other; only the DB failure is fatal
+    jobs = [db.deactivate_user(pool, discord_id)]
+    if member:
+        jobs.append(remove_user_roles(member))
+    results = await asyncio.gather(*jobs, return_exceptions=True)
+    if isinstance(results[0], BaseException):
+        raise results[0]
+    for result in results[1:]:
+        if isinstance(result, BaseException):
+            logger.error("role removal failed: %s", discord_id, exc_info=result)
+
+
 async def polling_loop() -> None:
     global last_poll_at
     await bot.wait_until_ready()
@@ -324,7 +509,8 @@ async def polling_loop() -> None:
             logger.exception("polling loop failed")
         interval = POLL_INTERVAL_SECONDS
         if pool and GUILD_ID:
-            settings = await db.get_settings(pool, GUILD_ID)
+            # a poll interval that is one cycle stale is harmless, and in-process writes invalidate anyway
+            settings = await get_settings_cached(GUILD_ID, ttl=max(interval, SETTINGS_CACHE_TTL_SECONDS))
             interval = settings.get("poll_interval_seconds", interval)
         await asyncio.sleep(interval)
 
@@ -364,35 +550,76 @@ async def healthcheck_loop() -> None:
         await asyncio.sleep(HEALTHCHECK_INTERVAL_SECONDS)
 
 
+def invalidate_rank_cache() -> None:
+    _rank_cache.clear()
+
+
+def request_rank_update() -> None:
+    # bursts of ACs collapse into a single edit by rank_update_loop
+    _rank_dirty.set()
+
+
+async def rank_update_loop() -> None:
+    await bot.wait_until_ready()
+    while True:
+        await _rank_dirty.wait()
+        _rank_dirty.clear()
+        guild = home_guild()
+        if guild:
+            try:
+                await update_rank_message(guild)
+            except Exception:
+                logger.exception("rank update failed")
+        await asyncio.sleep(RANK_UPDATE_MIN_INTERVAL_SECONDS)
+
+
+async def strip_role(role: discord.Role, keep_id: int | None = None) -> None:
+    # a repeat winner keeps the role instead of losing and regaining it
+    sem = asyncio.Semaphore(ROLE_EDIT_CONCURRENCY)
+
+    async def _one(member: discord.Member) -> None:
+        async with sem:
+            await member.remove_roles(role)
+
+    results = await asyncio.gather(
+        *(_one(member) for member in role.members if member.id != keep_id), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
 async def handle_weekly_reset() -> None:
     if not pool:
         return
-    guild = bot.get_guild(GUILD_ID) if GUILD_ID else None
+    guild = home_guild()
     if not guild:
         return
-    current_start = week_start_jst(now_utc())
+    current_start = current_week_start()
     prev_start = current_start - timedelta(days=7)
-    scores = await db.get_weekly_scores(pool, prev_start)
+    invalidate_rank_cache()
+    _goal_cache.clear()
+    _weekly_score_cache.clear()
+    scores = await db.get_weekly_scores(reader(), prev_start)
     if scores:
         winner_id = scores[0]["discord_id"]
-        settings = await db.get_settings(pool, guild.id)
+        settings = await get_settings_cached(guild.id)
         role_weekly_id = settings.get("role_weekly_id")
         if role_weekly_id:
             role = guild.get_role(role_weekly_id)
             if role:
                 try:
-                    for member in role.members:
-                        await member.remove_roles(role)
+                    await strip_role(role, keep_id=winner_id)
                     winner = guild.get_member(winner_id)
                     if winner is None:
                         try:
                             winner = await guild.fetch_member(winner_id)
                         except (discord.NotFound, discord.Forbidden):
                             winner = None
-                    if winner:
-                        await winner.add_roles(role)
-                    else:
+                    if winner is None:
                         logger.warning("weekly winner not found in guild: %s", winner_id)
+                    elif role not in winner.roles:
+                        await winner.add_roles(role)
                 except discord.Forbidden:
                     logger.warning("missing permissions to update weekly role")
         else:
@@ -400,7 +627,7 @@ async def handle_weekly_reset() -> None:
     else:
         logger.info("no weekly scores for %s; skip weekly role", to_jst(prev_start).strftime("%Y-%m-%d %H:%M"))
     await send_weekly_reset_message(guild, prev_start, scores, current_start, force_ai=True)
-    await update_rank_message(guild)
+    request_rank_update()
     await update_all_ratings(guild)
 
 
@@ -408,68 +635,105 @@ async def update_all_ratings(guild: discord.Guild) -> None:
     global last_ratings_sync_at
     if not session or not pool:
         return
-    users = await db.get_active_users(pool)
-    for user in users:
+    users = await db.get_active_users(reader())
+    sem = asyncio.Semaphore(USER_FANOUT_CONCURRENCY)
+
+    async def _one(user) -> int | None:
+        async with sem:
+            try:
+                return await atcoder_api.fetch_user_rating(session, user["atcoder_id"])
+            except Exception:
+                logger.exception("rating update failed: %s", user["atcoder_id"])
+                return None
+
+    ratings = await asyncio.gather(*(_one(user) for user in users))
+    rows = [(user["discord_id"], rating) for user, rating in zip(users, ratings) if rating is not None]
+    await db.upsert_ratings(pool, rows)
+    # role edits stay sequential; most are no-ops and the rest share Discord's per-guild rate limit
+    for discord_id, rating in rows:
+        member = guild.get_member(discord_id)
+        if not member:
+            continue
         try:
-            rating = await atcoder_api.fetch_user_rating(session, user["atcoder_id"])
-            if rating is None:
-                continue
-            await db.upsert_rating(pool, user["discord_id"], rating)
-            member = guild.get_member(user["discord_id"])
-            if member:
-                await apply_color_role(member, rating)
+            await apply_color_role(member, rating)
         except Exception:
-            logger.exception("rating update failed: %s", user["atcoder_id"])
+            logger.exception("color role update failed: %s", discord_id)
     last_ratings_sync_at = now_utc()
 
 
+def spawn_background(coro) -> asyncio.Task:
+    # the loop only keeps weak refs to tasks; hold them until done
+    task = asyncio.create_task(coro)
+    _bg_tasks.add(task)
+    task.add_done_callback(_bg_tasks.discard)
+    return task
+
+
+async def sync_registered_rating(guild: discord.Guild, discord_id: int, atcoder_id: str) -> None:
+    # runs after the interaction reply so the atcoder.jp round trip doesn't hold the handler
+    try:
+        rating = await atcoder_api.fetch_user_rating(session, atcoder_id)
+        if rating is None:
+            return
+        member = guild.get_member(discord_id)
+        if member:
+            # the role edit doesn't read the ratings row, so it can overlap the write
+            await asyncio.gather(db.upsert_rating(pool, discord_id, rating), apply_color_role(member, rating))
+        else:
+            await db.upsert_rating(pool, discord_id, rating)
+    except Exception:
+        logger.exception("rating update failed: %s", atcoder_id)
+
+
 async def poll_all_users() -> None:
     if not session or not pool:
         return
-    users = await db.get_active_users(pool)
-    for user in users:
-        try:
+    users = await db.get_active_users(reader())
+    sem = asyncio.Semaphore(USER_FANOUT_CONCURRENCY)
+
+    # users poll concurrently; their writes queue on db.transaction's per-connection lock
+    async def _one(user) -> None:
+        async with sem:
             await poll_user(user["discord_id"], user["atcoder_id"])
-        except Exception:
-            logger.exception("poll user failed: %s", user["atcoder_id"])
+
+    results = await asyncio.gather(*(_one(user) for user in users), return_exceptions=True)
+    for user, result in zip(users, results):
+        if isinstance(result, BaseException):
+            logger.error("poll user failed: %s", user["atcoder_id"], exc_info=result)
 
 
 async def poll_user(discord_id: int, atcoder_id: str) -> None:
     if not session or not pool:
         return
-    state = await db.get_fetch_state(pool, discord_id)
+    state = await db.get_fetch_state(reader(), discord_id)
     last_epoch = int(state.get("last_checked_epoch", 0))
     last_submission_id = state.get("last_submission_id")
     lookback_seconds = 86400
     window_start = max(0, last_epoch - lookback_seconds)
     try:
-        results = await atcoder_api.fetch_user_results(session, atcoder_id, window_start)
+        results = await atcoder_api.fetch_user_results(
+            session, atcoder_id, window_start, predicate=atcoder_api.is_accepted
+        )
     except Exception:
         logger.exception("failed to fetch results: %s", atcoder_id)
         return
-    filtered = []
+    # the lookback window deliberately re-offers older ACs because the API indexes late;
+    # handle_ac drops the ones already recorded, so only the boundary second is deduped here
+    pending = []
     for r in results:
-        if r.get("result") != "AC":
-            continue
         epoch = int(r.get("epoch_second", 0))
-        sid = r.get("id")
         if epoch < window_start:
             continue
-        if epoch > last_epoch:
-            filtered.append(r)
-        elif epoch == last_epoch and last_submission_id is not None and sid and sid > last_submission_id:
-            filtered.append(r)
-        elif epoch == last_epoch and last_submission_id is None:
-            filtered.append(r)
-        elif epoch < last_epoch:
-            filtered.append(r)
-    filtered.sort(key=lambda x: (x.get("epoch_second", 0), x.get("id") or 0))
-    if not filtered:
+        sid = r.get("id")
+        if epoch == last_epoch and last_submission_id is not None and not (sid and sid > last_submission_id):
+            continue
+        pending.append((epoch, sid or 0, r))
+    if not pending:
         return
+    pending.sort(key=itemgetter(0, 1))
     new_last_epoch = last_epoch
     new_last_id = last_submission_id
-    for r in filtered:
-        epoch = int(r.get("epoch_second", 0))
+    for epoch, _, r in pending:
         submitted_at = datetime.fromtimestamp(epoch, tz=timezone.utc)
         processed = await handle_ac(discord_id, atcoder_id, r, submitted_at)
         if epoch > new_last_epoch:
@@ -489,77 +753,93 @@ async def handle_ac(discord_id: int, atcoder_id: str, submission: dict, submitte
     if not problem_id:
         return False
     submission_id = submission.get("id")
-    last_ac_at = await db.get_last_ac(pool, discord_id, problem_id)
+    last_ac_at = await get_last_ac_cached(discord_id, problem_id)
     if last_ac_at and submitted_at - last_ac_at < timedelta(days=7):
         return False
-    problem = await db.get_problem(pool, problem_id)
+    context = await db.get_ac_context(reader(), discord_id, problem_id)
+    problem = context["problem"]
     title = problem.get("title") if problem else problem_id
     difficulty = problem.get("difficulty") if problem else None
     contest_id = problem.get("contest_id") if problem else None
 
-    rating = await db.get_rating(pool, discord_id)
+    rating = context["rating"]
 
     if difficulty is None:
         score_base = 150
         diff_emoji = ""
     else:
         score_base = base_score(rating, difficulty)
-        diff_emoji = COLOR_EMOJI[color_key(difficulty)]
-    rate_emoji = COLOR_EMOJI[color_key(rating)]
+        diff_emoji = color_emoji(difficulty)
+    rate_emoji = color_emoji(rating)
 
-    streak_info = await db.get_streak(pool, discord_id)
-    current_streak = streak_info["current_streak"]
-    last_date = streak_info["last_ac_date"]
-    today = to_jst(submitted_at).date()
+    current_streak = context["current_streak"]
+    last_date = context["last_ac_date"]
+    submitted_jst = to_jst(submitted_at)
+    today = submitted_jst.date()
     if last_date == today:
         new_streak = current_streak
     elif last_date == (today - timedelta(days=1)):
         new_streak = current_streak + 1
     else:
         new_streak = 1
-    await db.update_streak(pool, discord_id, new_streak, today)
 
     mult = streak_multiplier(new_streak)
     score_final = round(score_base * mult)
 
-    week_start = week_start_jst(submitted_at)
-    await db.insert_submission(pool, discord_id, problem_id, submitted_at, score_base, mult, score_final)
-    await db.add_weekly_score(pool, week_start, discord_id, score_final)
-    await db.upsert_last_ac(pool, discord_id, problem_id, submitted_at)
-
-    await maybe_update_streak_role(discord_id, new_streak)
-    await send_ac_notification(
-        discord_id,
-        atcoder_id,
-        title,
-        problem_id,
-        contest_id,
-        submission_id,
-        submitted_at,
-        score_final,
-        score_base,
-        diff_emoji,
-        rate_emoji,
-        difficulty,
-        rating,
-        new_streak,
+    week_start = week_start_of_jst(submitted_jst)
+    await db.record_accept(
+        pool,
+        discord_id=discord_id,
+        problem_id=problem_id,
+        submitted_at=submitted_at,
+        week_start=week_start,
+        score_base=score_base,
+        streak_mult=mult,
+        score_final=score_final,
+        current_streak=new_streak,
+        last_ac_date=today,
     )
+    _remember_last_ac((discord_id, problem_id), submitted_at)
+    _weekly_score_cache.pop((discord_id, week_start), None)
+    invalidate_rank_cache()
+
+    async def notify() -> None:
+        # the milestone message should land after the AC notification it follows from
+        await send_ac_notification(
+            discord_id,
+            atcoder_id,
+            title,
+            problem_id,
+            contest_id,
+            submission_id,
+            submitted_at,
+            score_final,
+            score_base,
+            diff_emoji,
+            rate_emoji,
+            difficulty,
+            rating,
+            new_streak,
+        )
+        await check_and_send_goal_milestone(discord_id, atcoder_id)
 
-    guild = bot.get_guild(GUILD_ID) if GUILD_ID else None
-    if guild:
-        await update_rank_message(guild)
-
-    await check_and_send_goal_milestone(discord_id, atcoder_id)
+    request_rank_update()
+    results = await asyncio.gather(
+        notify(), maybe_update_streak_role(discord_id, new_streak), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error("post-AC update failed: %s %s", atcoder_id, problem_id, exc_info=result)
     return True
 
 
 async def maybe_update_streak_role(discord_id: int, streak: int) -> None:
-    if not pool or not GUILD_ID:
+    if not pool:
         return
-    guild = bot.get_guild(GUILD_ID)
+    guild = home_guild()
     if not guild:
         return
-    settings = await db.get_settings(pool, guild.id)
+    settings = await get_settings_cached(guild.id)
     role_id = settings.get("role_streak_id")
     if not role_id:
         return
@@ -578,26 +858,46 @@ async def maybe_update_streak_role(discord_id: int, streak: int) -> None:
         logger.warning("missing permissions to update streak role")
 
 
+_TEMPLATE_THRESHOLDS = (200, 350, 400)
+_TEMPLATE_KEYS = ("low", "mid", "high", "top")
+_TEMPLATE_CHOICES = tuple(NOTIFY_TEMPLATES[key] for key in _TEMPLATE_KEYS)
+_MARKER_THRESHOLDS = (200, 350)
+_MARKERS = ("", "🔥", "💥💥")
+
+
 def pick_template(score: int) -> str:
-    if score < 200:
-        key = "low"
-    elif score < 300:
-        key = "mid"
-    elif score < 350:
-        key = "mid"
-    elif score < 400:
-        key = "high"
-    else:
-        key = "top"
-    return random.choice(NOTIFY_TEMPLATES[key])
+    return random.choice(_TEMPLATE_CHOICES[bisect.bisect_right(_TEMPLATE_THRESHOLDS, score)])
 
 
 def score_marker(score: int) -> str:
-    if score < 200:
-        return ""
-    if score < 350:
-        return "🔥"
-    return "💥💥"
+    return _MARKERS[bisect.bisect_right(_MARKER_THRESHOLDS, score)]
+
+
+async def generate_notify_description(prompt: str, models: list[str], atcoder_id: str) -> str | None:
+    # one request per model, issued together; output keeps the configured model order
+    results = await asyncio.gather(
+        *(generate_message(prompt, model=model_name) for model_name in models),
+        return_exceptions=True,
+    )
+    ai_texts = []
+    for model_name, ai_text in zip(models, results):
+        if isinstance(ai_text, Exception):
+            logger.error("AC AI message failed model=%s user=%s", model_name, atcoder_id, exc_info=ai_text)
+        elif ai_text:
+            ai_texts.append((model_name, ai_text))
+            logger.info(
+                "AC AI message ok model=%s len=%s user=%s",
+                model_name,
+                len(ai_text),
+                atcoder_id,
+            )
+        else:
+            logger.info("AC AI message empty model=%s user=%s", model_name, atcoder_id)
+    if not ai_texts:
+        return None
+    if len(ai_texts) == 1:
+        return ai_texts[0][1]
+    return "\n".join(f"[{model_display_name(model)}] {text}" for model, text in ai_texts)
 
 
 def model_display_name(model: str) -> str:
@@ -712,12 +1012,12 @@ async def send_ac_notification(
     rating: int,
     streak: int,
 ) -> None:
-    if not pool or not GUILD_ID:
+    if not pool:
         return
-    guild = bot.get_guild(GUILD_ID)
+    guild = home_guild()
     if not guild:
         return
-    settings = await db.get_settings(pool, guild.id)
+    settings = await get_settings_cached(guild.id)
     notify_models = resolve_notify_models(settings)
     notify_channel_id = settings.get("notify_channel_id")
     if not notify_channel_id:
@@ -739,81 +1039,36 @@ async def send_ac_notification(
     template = pick_template(score)
     description = template.format(user=display_name)
 
-    week_start = week_start_jst(now_utc())
-    weekly_score = await db.get_weekly_score(pool, week_start, discord_id)
+    week_start = current_week_start()
+    weekly_score = await get_weekly_score_cached(week_start, discord_id)
 
     ai_enabled = settings.get("ai_enabled", AI_ENABLED)
     ai_prob = settings.get("ai_probability", AI_PROBABILITY)
     if ai_enabled:
-        roll = random.randint(1, 100)
-        logger.info("AC AI roll=%s prob=%s user=%s", roll, ai_prob, atcoder_id)
+        # uniform in [0, 100): roll < prob fires with probability prob%
+        roll = random.random() * 100
+        logger.info("AC AI roll=%.1f prob=%s user=%s", roll, ai_prob, atcoder_id)
     else:
         roll = None
-    if ai_enabled and roll is not None and roll <= ai_prob:
+    if ai_enabled and roll is not None and roll < ai_prob:
         use_hard = score >= 350
         hard_rule = "「難問/難問突破/難しい」などの語は使用可。" if use_hard else "「難問/難問突破/難しい」などの語は禁止。"
-        recent_msgs = await db.get_recent_notify_history(pool, limit=5)
-        msg_lines = []
-        for row in recent_msgs:
-            msg = row.get("message_text") or ""
-            if msg:
-                msg_lines.append(msg)
+        msg_lines = [msg for msg in await get_recent_notify_texts() if msg]
         recent_text = "\n".join(msg_lines) if msg_lines else "なし"
-        prompt = (
-            "AtCoderのAC通知に添える一言を作成。\n\n"
-            "<状況>\n"
-            f"- ユーザー: {atcoder_id}\n"
-            f"- 問題: {title}\n"
-            f"- 獲得スコア: +{score}pts（高いほど難しい問題）\n"
-            f"- 週間累計: {weekly_score}pts\n"
-            f"- 問題難易度: {difficulty}（数値が高いほど難問）\n"
-            f"- ユーザーレート: {rating}\n"
-            f"- 連続AC日数: {streak}日\n"
-            "- スコア帯の目安:\n"
-            "  - 0〜199: 軽め/基礎\n"
-            "  - 200〜349: 標準〜やや高め\n"
-            "  - 350以上: 高難度/難問\n"
-            "</状況>\n\n"
-            "<条件>\n"
-            "- 日本語1文、25〜60文字\n"
-            "- 絵文字1〜2個\n"
-            "- ポジティブで自然な口調\n"
-            "- 状況に合わせて言及（streak長い→継続を褒める、高難度→突破を称える等）\n"
-            f"- 語彙制約: {hard_rule}\n"
-            "- 難易度の表現は必須ではないが、入れる場合はスコア帯の目安に従うこと\n"
-            "- 直近5件の通知と被らない内容にする（焦点を変える：例=難易度/継続/スコア/ペース/達成感など）\n"
-            "</条件>\n\n"
-            "<例>\n"
-            "- ナイスAC！勢いがあるね🔥\n"
-            "- 難問突破おめでとう！実力ついてきた✨\n"
-            "- 7日連続AC、習慣化できてる💪\n"
-            "- 着実に積み上げてるね、いい調子👍\n"
-            "</例>\n\n"
-            "<直近5件の通知（重複回避の参考）>\n"
-            f"{recent_text}\n"
-            "</直近5件の通知>\n\n"
-            "一言のみ出力（説明不要）："
+        prompt = AC_AI_PROMPT.format(
+            atcoder_id=atcoder_id,
+            title=title,
+            score=score,
+            weekly_score=weekly_score,
+            difficulty=difficulty,
+            rating=rating,
+            streak=streak,
+            hard_rule=hard_rule,
+            recent_text=recent_text,
         )
-        ai_texts = []
-        for model_name in notify_models:
-            ai_text = await generate_message(prompt, model=model_name)
-            if ai_text:
-                ai_texts.append((model_name, ai_text))
-                logger.info(
-                    "AC AI message ok model=%s len=%s user=%s",
-                    model_name,
-                    len(ai_text),
-                    atcoder_id,
-                )
-            else:
-                logger.info("AC AI message empty model=%s user=%s", model_name, atcoder_id)
-        if ai_texts:
-            if len(ai_texts) == 1:
-                description = ai_texts[0][1]
-            else:
-                description = "\n".join(
-                    f"[{model_display_name(model)}] {text}" for model, text in ai_texts
-                )
+        ai_description = await generate_notify_description(prompt, notify_models, atcoder_id)
+        if ai_description:
+            description = ai_description
 
     # descriptionはメッセージ本体のみ（難易度はフィールドに表示）
 
@@ -853,22 +1108,24 @@ async def send_ac_notification(
         )
     except Exception:
         logger.exception("failed to store notify history")
+    else:
+        remember_notify_text(description)
 
 
 async def check_and_send_goal_milestone(discord_id: int, atcoder_id: str) -> None:
-    if not pool or not GUILD_ID:
+    if not pool:
         return
-    guild = bot.get_guild(GUILD_ID)
+    guild = home_guild()
     if not guild:
         return
-    week_start = week_start_jst(now_utc())
-    goal = await db.get_weekly_goal(pool, discord_id, week_start)
+    week_start = current_week_start()
+    goal = await get_weekly_goal_cached(discord_id, week_start)
     if not goal:
         return
     target = goal["target_score"]
     if target <= 0:
         return
-    current_score = await db.get_weekly_score(pool, week_start, discord_id)
+    current_score = await get_weekly_score_cached(week_start, discord_id)
     pct = current_score / target * 100
 
     milestones = [
@@ -886,6 +1143,7 @@ async def check_and_send_goal_milestone(discord_id: int, atcoder_id: str) -> Non
         return
 
     await db.update_goal_notification(pool, discord_id, week_start, milestone_to_send)
+    invalidate_weekly_goal(discord_id, week_start)
     await send_goal_milestone_notification(guild, discord_id, atcoder_id, current_score, target, milestone_to_send)
 
 
@@ -899,7 +1157,7 @@ async def send_goal_milestone_notification(
 ) -> None:
     if not pool:
         return
-    settings = await db.get_settings(pool, guild.id)
+    settings = await get_settings_cached(guild.id)
     notify_channel_id = settings.get("notify_channel_id")
     if not notify_channel_id:
         return
@@ -916,24 +1174,10 @@ async def send_goal_milestone_notification(
         ai_comment = None
         ai_enabled = settings.get("ai_enabled", AI_ENABLED)
         if ai_enabled:
-            prompt = (
-                "週間目標達成のお祝いメッセージを作成。\n\n"
-                "<状況>\n"
-                f"- ユーザー: {atcoder_id}\n"
-                f"- 目標: {target_score}pts\n"
-                f"- 達成スコア: {current_score}pts\n"
-                "</状況>\n\n"
-                "<条件>\n"
-                "- 日本語2〜3文、60〜120文字程度\n"
-                "- 絵文字2〜3個\n"
-                "- 達成を盛大に称え、ユーモアや個性を交えて\n"
-                "- 次への意欲も促す\n"
-                "</条件>\n\n"
-                "<例>\n"
-                "- 目標達成おめでとう！🎉 自分で決めた目標をクリアするの、最高にかっこいい。来週もその調子で攻めていこう💪\n"
-                "- やりましたね！✨ コツコツ積み上げた努力が実を結んだ瞬間。この勢いで次の目標も粉砕しちゃおう🔥\n"
-                "</例>\n\n"
-                "メッセージのみ出力："
+            prompt = GOAL_AI_PROMPT.format(
+                atcoder_id=atcoder_id,
+                target_score=target_score,
+                current_score=current_score,
             )
             ai_comment = await generate_message(
                 prompt,
@@ -957,10 +1201,10 @@ async def send_goal_milestone_notification(
         logger.warning("missing permissions to send goal milestone notification")
 
 
-async def update_rank_message(guild: discord.Guild) -> None:
+async def update_rank_message(guild: discord.Guild, force: bool = False) -> None:
     if not pool:
         return
-    settings = await db.get_settings(pool, guild.id)
+    settings = await get_settings_cached(guild.id)
     rank_channel_id = settings.get("rank_channel_id")
     if not rank_channel_id:
         return
@@ -977,12 +1221,17 @@ async def update_rank_message(guild: discord.Guild) -> None:
     if not isinstance(channel, discord.TextChannel):
         return
     embed = await build_rank_embed(guild)
+    embed_data = embed.to_dict()
 
     message_id = settings.get("rank_message_id")
     if message_id:
+        # force skips the memo: the message may have been deleted by hand since the last edit
+        if not force and _last_rank_embed.get(guild.id) == (channel.id, message_id, embed_data):
+            return
         try:
-            msg = await channel.fetch_message(message_id)
-            await msg.edit(content="", embed=embed)
+            # edit through a partial message: one PATCH instead of a GET followed by a PATCH
+            await channel.get_partial_message(message_id).edit(content="", embed=embed)
+            _last_rank_embed[guild.id] = (channel.id, message_id, embed_data)
             return
         except discord.NotFound:
             pass
@@ -998,23 +1247,22 @@ async def update_rank_message(guild: discord.Guild) -> None:
         await msg.pin(reason="Ranking message")
     except discord.Forbidden:
         pass
-    await db.update_setting(pool, guild.id, "rank_message_id", msg.id)
+    await update_guild_setting(guild.id, "rank_message_id", msg.id)
+
+
+def _truncate_label(label: str, limit: int = 24) -> str:
+    return label if len(label) <= limit else label[: limit - 3] + "..."
 
 
 def format_rank_name(guild: discord.Guild, row: dict) -> str:
     if "name" in row and row["name"]:
-        label = row["name"]
-        return label if len(label) <= 24 else label[:21] + "..."
+        return _truncate_label(row["name"])
     atcoder_id = row.get("atcoder_id") or "unknown"
     user_id = row.get("discord_id")
-    if not user_id:
-        return atcoder_id if len(atcoder_id) <= 24 else atcoder_id[:21] + "..."
-    member = guild.get_member(user_id)
+    member = guild.get_member(user_id) if user_id else None
     if not member:
-        return atcoder_id if len(atcoder_id) <= 24 else atcoder_id[:21] + "..."
-    display = member.display_name
-    label = f"{atcoder_id} ({display})"
-    return label if len(label) <= 24 else label[:21] + "..."
+        return _truncate_label(atcoder_id)
+    return _truncate_label(f"{atcoder_id} ({member.display_name})")
 
 
 async def build_rank_embed(
@@ -1024,13 +1272,36 @@ async def build_rank_embed(
     week_start: datetime | None = None,
     as_of: datetime | None = None,
 ) -> discord.Embed:
-    week_start = week_start or week_start_jst(now_utc())
+    # only the live ranking is cached; reset/preview callers pass an explicit period or scores
+    use_cache = scores_override is None and week_start is None and as_of is None
+    week_start = week_start or current_week_start()
+    cache_key = (guild.id, week_start)
+    if use_cache:
+        cached = _rank_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < RANK_CACHE_TTL_SECONDS:
+            return cached[1].copy()
+    scores = scores_override if scores_override is not None else await db.get_weekly_scores(reader(), week_start)
+    embed = _render_rank_embed(guild, scores, week_start, as_of or now_utc())
+    if use_cache:
+        _rank_cache[cache_key] = (time.monotonic(), embed.copy())
+    return embed
+
+
+RANK_MEDALS = ("🥇", "🥈", "🥉")
+# pads the score column with NBSP so Discord keeps the alignment
+_NBSP_TRANS = str.maketrans(" ", "\u00A0")
+
+
+def _render_rank_embed(
+    guild: discord.Guild,
+    scores: list[dict],
+    week_start: datetime,
+    as_of: datetime,
+) -> discord.Embed:
     week_end = week_start + timedelta(days=7)
-    as_of = as_of or now_utc()
     week_start_jst_str = to_jst(week_start).strftime("%Y-%m-%d %H:%M")
     week_end_jst_str = to_jst(week_end).strftime("%Y-%m-%d %H:%M")
     updated_jst_str = to_jst(as_of).strftime("%Y-%m-%d %H:%M")
-    scores = scores_override or await db.get_weekly_scores(pool, week_start)
 
     embed = discord.Embed(
         title="🏆 週間ランキング",
@@ -1047,15 +1318,13 @@ async def build_rank_embed(
         embed.description = header + "\n\n" + "まだスコアがありません"
         return embed
 
-    medal = {1: "🥇", 2: "🥈", 3: "🥉"}
-    score_width = max(2, max(len(str(row["score"])) for row in scores))
-    lines = []
-    for i, row in enumerate(scores, start=1):
-        prefix = medal.get(i, str(i))
-        score_str = str(row["score"]).rjust(score_width)
-        score_str = score_str.replace(" ", "\u00A0")
-        lines.append(f"{prefix} **{score_str}** - {format_rank_name(guild, row)}")
-    body = "\n".join(lines)
+    score_strs = [str(row["score"]) for row in scores]
+    score_width = max(2, max(map(len, score_strs)))
+    body = "\n".join(
+        f"{RANK_MEDALS[i] if i < 3 else i + 1} **{score_str.rjust(score_width).translate(_NBSP_TRANS)}**"
+        f" - {format_rank_name(guild, row)}"
+        for i, (row, score_str) in enumerate(zip(scores, score_strs))
+    )
     if len(body) > 900:
         body = body[:890] + "\n...（省略）"
     embed.description = header + "\n\n" + body
@@ -1074,7 +1343,7 @@ async def send_weekly_reset_message(
 ) -> None:
     if not pool:
         return
-    settings = await db.get_settings(pool, guild.id)
+    settings = await get_settings_cached(guild.id)
     if channel_override is None:
         notify_channel_id = settings.get("notify_channel_id")
         if not notify_channel_id:
@@ -1104,10 +1373,18 @@ async def send_weekly_reset_message(
 
     ai_enabled = settings.get("ai_enabled", AI_ENABLED)
     ai_prob = settings.get("ai_probability", AI_PROBABILITY)
-    if force_ai or (ai_enabled and random.randint(1, 100) <= ai_prob):
-        prev_start = week_start - timedelta(days=7)
-        prev_scores = await db.get_weekly_scores(pool, prev_start)
-        prev_map = {row["discord_id"]: row["score"] for row in prev_scores if row.get("discord_id") is not None}
+    if force_ai or (ai_enabled and random.random() * 100 < ai_prob):
+        past_weeks = [week_start - timedelta(days=7 * i) for i in range(1, 6)]
+        past_week_scores = await db.get_weekly_scores_multi(reader(), past_weeks)
+        prev_map = {}
+        prev_top = set()
+        for idx, row in enumerate(past_week_scores[0]):
+            discord_id = row.get("discord_id")
+            if discord_id is None:
+                continue
+            prev_map[discord_id] = row["score"]
+            if idx < 3:
+                prev_top.add(discord_id)
 
         top_lines = []
         for i, row in enumerate(scores[:3], start=1):
@@ -1115,7 +1392,6 @@ async def send_weekly_reset_message(
             top_lines.append(f"{i}:{name}:{row['score']}")
 
         repeated = []
-        prev_top = {row["discord_id"] for row in prev_scores[:3] if row.get("discord_id") is not None}
         for row in scores[:3]:
             discord_id = row.get("discord_id")
             if discord_id is not None and discord_id in prev_top:
@@ -1138,7 +1414,7 @@ async def send_weekly_reset_message(
             sign = "+" if delta > 0 else ""
             delta_lines.append(f"{name}:{sign}{delta}")
 
-        recent_reports = await db.get_recent_weekly_reports(pool, limit=5)
+        recent_reports = await db.get_recent_weekly_reports(reader(), limit=5)
         report_blocks = []
         for report in recent_reports:
             week_label = report.get("week_start") or "unknown"
@@ -1149,38 +1425,20 @@ async def send_weekly_reset_message(
 
         # 過去5週のランキング結果を取得
         past_rankings = []
-        for i in range(1, 6):
-            past_week = week_start - timedelta(days=7 * i)
-            past_scores = await db.get_weekly_scores(pool, past_week)
+        for past_week, past_scores in zip(past_weeks, past_week_scores):
             if past_scores:
                 past_top = [f"{row.get('atcoder_id') or 'unknown'}:{row['score']}" for row in past_scores[:3]]
                 week_label = to_jst(past_week).strftime("%m/%d")
                 past_rankings.append(f"[{week_label}] {', '.join(past_top)}")
         past_rankings_text = "\n".join(past_rankings) if past_rankings else "なし"
 
-        prompt = (
-            "週間ランキングリセットに添えるコメントを作成。\n\n"
-            "<今週の結果>\n"
-            f"- 参加人数: {total_users}人\n"
-            f"- 上位3名: {', '.join(top_lines) if top_lines else 'なし'}\n"
-            f"- 2週連続で上位3入り: {', '.join(repeated) if repeated else 'なし'}\n"
-            f"- 前週からの伸び: {', '.join(delta_lines) if delta_lines else 'なし'}\n"
-            "</今週の結果>\n\n"
-            "<過去5週のランキング>\n"
-            f"{past_rankings_text}\n"
-            "</過去5週のランキング>\n\n"
-            "<過去のコメント（重複を避ける参考）>\n"
-            f"{recent_text}\n"
-            "</過去のコメント>\n\n"
-            "<条件>\n"
-            "- 日本語2〜3文、60〜120文字程度\n"
-            "- 絵文字2〜3個\n"
-            "- 一週間の労いと来週への応援\n"
-            "- ユーモアや個性を交えて\n"
-            "- 過去と被らない表現で\n"
-            "- 上位者や伸びた人に言及してもよいし、全体を労うだけでもよい\n"
-            "</条件>\n\n"
-            "メッセージのみ出力："
+        prompt = WEEKLY_RESET_AI_PROMPT.format(
+            total_users=total_users,
+            top=", ".join(top_lines) if top_lines else "なし",
+            repeated=", ".join(repeated) if repeated else "なし",
+            deltas=", ".join(delta_lines) if delta_lines else "なし",
+            past_rankings=past_rankings_text,
+            recent_text=recent_text,
         )
         ai_text = await generate_message(
             prompt,
@@ -1206,12 +1464,12 @@ async def send_weekly_reset_message(
 
 
 async def send_healthcheck() -> None:
-    if not pool or not GUILD_ID:
+    if not pool:
         return
-    guild = bot.get_guild(GUILD_ID)
+    guild = home_guild()
     if not guild:
         return
-    settings = await db.get_settings(pool, guild.id)
+    settings = await get_settings_cached(guild.id)
     health_channel_id = settings.get("health_channel_id")
     if not health_channel_id:
         return
@@ -1225,7 +1483,7 @@ async def send_healthcheck() -> None:
     if not isinstance(channel, discord.TextChannel):
         return
 
-    active_users = await db.get_active_users(pool)
+    active_users = await db.get_active_users(reader())
     now = now_utc()
     uptime = now - started_at
     uptime_hours = int(uptime.total_seconds() // 3600)
@@ -1251,7 +1509,7 @@ async def register(interaction: discord.Interaction, atcoder_id: str, user: disc
     if not pool:
         await interaction.response.send_message("DB未接続", ephemeral=True)
         return
-    settings = await db.get_settings(pool, interaction.guild_id)
+    settings = await get_settings_cached(interaction.guild_id)
     notify_models = resolve_notify_models(settings)
     target = user or interaction.user
     if user and not interaction.user.guild_permissions.administrator:
@@ -1263,12 +1521,7 @@ async def register(interaction: discord.Interaction, atcoder_id: str, user: disc
     if GUILD_ID:
         guild = bot.get_guild(GUILD_ID)
         if guild:
-            rating = await atcoder_api.fetch_user_rating(session, normalized)
-            if rating is not None:
-                await db.upsert_rating(pool, target.id, rating)
-                member = guild.get_member(target.id)
-                if member:
-                    await apply_color_role(member, rating)
+            spawn_background(sync_registered_rating(guild, target.id, normalized))
 
 
 @bot.tree.command(name="unregister")
@@ -1281,11 +1534,8 @@ async def unregister(interaction: discord.Interaction, user: discord.Member | No
     if user and not interaction.user.guild_permissions.administrator:
         await interaction.response.send_message("管理者のみ代理解除できます", ephemeral=True)
         return
-    await db.deactivate_user(pool, target.id)
-    if interaction.guild:
-        member = interaction.guild.get_member(target.id)
-        if member:
-            await remove_user_roles(member)
+    member = interaction.guild.get_member(target.id) if interaction.guild else None
+    await deactivate_member(target.id, member)
     await interaction.response.send_message(f"解除しました: {target.mention}")
 
 
@@ -1297,7 +1547,7 @@ async def set_notify_channel(interaction: discord.Interaction, channel: discord.
     if not interaction.user.guild_permissions.administrator:
         await interaction.response.send_message("管理者のみ設定できます", ephemeral=True)
         return
-    await db.update_setting(pool, interaction.guild_id, "notify_channel_id", channel.id)
+    await update_guild_setting(interaction.guild_id, "notify_channel_id", channel.id)
     await interaction.response.send_message(f"通知チャンネルを設定しました: {channel.mention}")
 
 
@@ -1309,7 +1559,8 @@ async def set_rank_channel(interaction: discord.Interaction, channel: discord.Te
     if not interaction.user.guild_permissions.administrator:
         await interaction.response.send_message("管理者のみ設定できます", ephemeral=True)
         return
-    await db.update_setting(pool, interaction.guild_id, "rank_channel_id", channel.id)
+    await update_guild_setting(interaction.guild_id, "rank_channel_id", channel.id)
+    _last_rank_embed.pop(interaction.guild_id, None)
     await interaction.response.send_message(f"ランキングチャンネルを設定しました: {channel.mention}")
     guild = interaction.guild
     if guild:
@@ -1324,7 +1575,7 @@ async def set_health_channel(interaction: discord.Interaction, channel: discord.
     if not interaction.user.guild_permissions.administrator:
         await interaction.response.send_message("管理者のみ設定できます", ephemeral=True)
         return
-    await db.update_setting(pool, interaction.guild_id, "health_channel_id", channel.id)
+    await update_guild_setting(interaction.guild_id, "health_channel_id", channel.id)
     await interaction.response.send_message(f"ヘルスチェックチャンネルを設定しました: {channel.mention}")
 
 
@@ -1340,8 +1591,8 @@ async def set_roles(
     if not interaction.user.guild_permissions.administrator:
         await interaction.response.send_message("管理者のみ設定できます", ephemeral=True)
         return
-    await db.update_setting(pool, interaction.guild_id, "role_weekly_id", weekly_role.id)
-    await db.update_setting(pool, interaction.guild_id, "role_streak_id", streak_role.id)
+    await update_guild_setting(interaction.guild_id, "role_weekly_id", weekly_role.id)
+    await update_guild_setting(interaction.guild_id, "role_streak_id", streak_role.id)
     await interaction.response.send_message("ロールを設定しました")
 
 
@@ -1357,8 +1608,8 @@ async def set_ai(
     if not interaction.user.guild_permissions.administrator:
         await interaction.response.send_message("管理者のみ設定できます", ephemeral=True)
         return
-    await db.update_setting(pool, interaction.guild_id, "ai_enabled", enabled)
-    await db.update_setting(pool, interaction.guild_id, "ai_probability", probability)
+    await update_guild_setting(interaction.guild_id, "ai_enabled", enabled)
+    await update_guild_setting(interaction.guild_id, "ai_probability", probability)
     await interaction.response.send_message("AI設定を更新しました")
 
 
@@ -1372,7 +1623,7 @@ async def set_ai_model(interaction: discord.Interaction, models: str | None = No
         await interaction.response.send_message("管理者のみ設定できます", ephemeral=True)
         return
     if not models or models.strip().lower() in {"default", "reset"}:
-        await db.update_setting(pool, interaction.guild_id, "ai_models_notify", None)
+        await update_guild_setting(interaction.guild_id, "ai_models_notify", None)
         await interaction.response.send_message("通知AIモデルをデフォルトに戻しました")
         return
     model_list = parse_models(models)
@@ -1380,7 +1631,7 @@ async def set_ai_model(interaction: discord.Interaction, models: str | None = No
         await interaction.response.send_message("モデル名を1つ以上指定してください", ephemeral=True)
         return
     normalized = ",".join(model_list)
-    await db.update_setting(pool, interaction.guild_id, "ai_models_notify", normalized)
+    await update_guild_setting(interaction.guild_id, "ai_models_notify", normalized)
     label = ", ".join(model_list)
     await interaction.response.send_message(f"通知AIモデルを設定しました: {label}")
 
@@ -1389,7 +1640,7 @@ async def set_ai_model(interaction: discord.Interaction, models: str | None = No
 async def ranking(interaction: discord.Interaction) -> None:
     if not interaction.guild:
         return
-    await update_rank_message(interaction.guild)
+    await update_rank_message(interaction.guild, force=True)
     await interaction.response.send_message("ランキングを更新しました", ephemeral=True)
 
 
@@ -1410,8 +1661,8 @@ async def debug_notify(interaction: discord.Interaction) -> None:
     streak = 3
     difficulty = 1200
     rating = 1500
-    diff_emoji = COLOR_EMOJI[color_key(difficulty)]
-    rate_emoji = COLOR_EMOJI[color_key(rating)]
+    diff_emoji = color_emoji(difficulty)
+    rate_emoji = color_emoji(rating)
     template = pick_template(score)
     description = template.format(user=display_name)
     base_score = 278
@@ -1448,7 +1699,7 @@ async def debug_notify_ai(interaction: discord.Interaction) -> None:
         return
 
     await interaction.response.defer(ephemeral=True)
-    settings = await db.get_settings(pool, interaction.guild_id)
+    settings = await get_settings_cached(interaction.guild_id)
     notify_models = resolve_notify_models(settings)
     display_name = "aisn"
     atcoder_id = "aisn"
@@ -1457,66 +1708,28 @@ async def debug_notify_ai(interaction: discord.Interaction) -> None:
     streak = 3
     difficulty = 1200
     rating = 1500
-    diff_emoji = COLOR_EMOJI[color_key(difficulty)]
-    rate_emoji = COLOR_EMOJI[color_key(rating)]
+    diff_emoji = color_emoji(difficulty)
+    rate_emoji = color_emoji(rating)
     template = pick_template(score)
     description = template.format(user=display_name)
     use_hard = score >= 350
     hard_rule = "「難問/難問突破/難しい」などの語は使用可。" if use_hard else "「難問/難問突破/難しい」などの語は禁止。"
-    recent_msgs = await db.get_recent_notify_history(pool, limit=5)
-    msg_lines = []
-    for row in recent_msgs:
-        msg = row.get("message_text") or ""
-        if msg:
-            msg_lines.append(msg)
+    msg_lines = [msg for msg in await get_recent_notify_texts() if msg]
     recent_text = "\n".join(msg_lines) if msg_lines else "なし"
-    prompt = (
-        "AtCoderのAC通知に添える一言を作成。\n\n"
-        "<状況>\n"
-        f"- ユーザー: {atcoder_id}\n"
-        "- 問題: ABC999 A Sample\n"
-        f"- 獲得スコア: +{score}pts（高いほど難しい問題）\n"
-        f"- 週間累計: {weekly_score}pts\n"
-        f"- 問題難易度: {difficulty}（数値が高いほど難問）\n"
-        f"- ユーザーレート: {rating}\n"
-        f"- 連続AC日数: {streak}日\n"
-        "- スコア帯の目安:\n"
-        "  - 0〜199: 軽め/基礎\n"
-        "  - 200〜349: 標準〜やや高め\n"
-        "  - 350以上: 高難度/難問\n"
-        "</状況>\n\n"
-        "<条件>\n"
-        "- 日本語1文、25〜60文字\n"
-        "- 絵文字1〜2個\n"
-        "- ポジティブで自然な口調\n"
-        "- 状況に合わせて言及（streak長い→継続を褒める、高難度→突破を称える等）\n"
-        f"- 語彙制約: {hard_rule}\n"
-        "- 難易度の表現は必須ではないが、入れる場合はスコア帯の目安に従うこと\n"
-        "- 直近5件の通知と被らない内容にする（焦点を変える：例=難易度/継続/スコア/ペース/達成感など）\n"
-        "</条件>\n\n"
-        "<例>\n"
-        "- ナイスAC！勢いがあるね🔥\n"
-        "- 難問突破おめでとう！実力ついてきた✨\n"
-        "- 7日連続AC、習慣化できてる💪\n"
-        "- 着実に積み上げてるね、いい調子👍\n"
-        "</例>\n\n"
-        "<直近5件の通知（重複回避の参考）>\n"
-        f"{recent_text}\n"
-        "</直近5件の通知>\n\n"
-        "一言のみ出力（説明不要）："
+    prompt = AC_AI_PROMPT.format(
+        atcoder_id=atcoder_id,
+        title="ABC999 A Sample",
+        score=score,
+        weekly_score=weekly_score,
+        difficulty=difficulty,
+        rating=rating,
+        streak=streak,
+        hard_rule=hard_rule,
+        recent_text=recent_text,
     )
-    ai_texts = []
-    for model_name in notify_models:
-        ai_text = await generate_message(prompt, model=model_name)
-        if ai_text:
-            ai_texts.append((model_name, ai_text))
-    if ai_texts:
-        if len(ai_texts) == 1:
-            description = ai_texts[0][1]
-        else:
-            description = "\n".join(
-                f"[{model_display_name(model)}] {text}" for model, text in ai_texts
-            )
+    ai_description = await generate_notify_description(prompt, notify_models, atcoder_id)
+    if ai_description:
+        description = ai_description
     base_score = 278
     embed = build_ac_embed(
         title="ABC999 A Sample",
@@ -1539,6 +1752,29 @@ async def debug_notify_ai(interaction: discord.Interaction) -> None:
     await interaction.followup.send("AI通知プレビューを送信しました", ephemeral=True)
 
 
+# sample data for the debug previews; read-only, shared across invocations
+DEBUG_RANK_SCORES = [
+    {"name": "Alice", "score": 1820},
+    {"name": "Bob", "score": 1710},
+    {"name": "Carol", "score": 1590},
+    {"name": "Dave", "score": 1505},
+    {"name": "Erin", "score": 1430},
+    {"name": "Fiona", "score": 1310},
+    {"name": "Gabe", "score": 1215},
+    {"name": "Hana", "score": 1150},
+    {"name": "Ivan", "score": 980},
+    {"name": "Jill", "score": 920},
+]
+DEBUG_RESET_SCORES = [
+    {"atcoder_id": "yz_", "score": 1152},
+    {"atcoder_id": "ri_ra", "score": 747},
+    {"atcoder_id": "sen469", "score": 600},
+    {"atcoder_id": "yuki_hitori", "score": 529},
+    {"atcoder_id": "blue_island", "score": 0},
+    {"atcoder_id": "carduusmille", "score": 0},
+]
+
+
 @bot.tree.command(name="debug_rank")
 async def debug_rank(interaction: discord.Interaction) -> None:
     if not pool:
@@ -1549,19 +1785,7 @@ async def debug_rank(interaction: discord.Interaction) -> None:
         return
     if not interaction.guild or not interaction.channel:
         return
-    fake_scores = [
-        {"name": "Alice", "score": 1820},
-        {"name": "Bob", "score": 1710},
-        {"name": "Carol", "score": 1590},
-        {"name": "Dave", "score": 1505},
-        {"name": "Erin", "score": 1430},
-        {"name": "Fiona", "score": 1310},
-        {"name": "Gabe", "score": 1215},
-        {"name": "Hana", "score": 1150},
-        {"name": "Ivan", "score": 980},
-        {"name": "Jill", "score": 920},
-    ]
-    embed = await build_rank_embed(interaction.guild, scores_override=fake_scores)
+    embed = await build_rank_embed(interaction.guild, scores_override=DEBUG_RANK_SCORES)
     await interaction.channel.send(embed=embed)
     await interaction.response.send_message("ランキングプレビューを送信しました", ephemeral=True)
 
@@ -1577,18 +1801,10 @@ async def debug_weekly_reset(interaction: discord.Interaction) -> None:
     if not interaction.guild:
         return
     await interaction.response.defer(ephemeral=True)
-    fake_scores = [
-        {"atcoder_id": "yz_", "score": 1152},
-        {"atcoder_id": "ri_ra", "score": 747},
-        {"atcoder_id": "sen469", "score": 600},
-        {"atcoder_id": "yuki_hitori", "score": 529},
-        {"atcoder_id": "blue_island", "score": 0},
-        {"atcoder_id": "carduusmille", "score": 0},
-    ]
     await send_weekly_reset_message(
         interaction.guild,
-        week_start_jst(now_utc()) - timedelta(days=7),
-        fake_scores,
+        current_week_start() - timedelta(days=7),
+        DEBUG_RESET_SCORES,
         next_week_start_jst(now_utc()),
         force_ai=False,
         channel_override=interaction.channel,
@@ -1608,18 +1824,10 @@ async def debug_weekly_reset_ai(interaction: discord.Interaction) -> None:
     if not interaction.guild:
         return
     await interaction.response.defer(ephemeral=True)
-    fake_scores = [
-        {"atcoder_id": "yz_", "score": 1152},
-        {"atcoder_id": "ri_ra", "score": 747},
-        {"atcoder_id": "sen469", "score": 600},
-        {"atcoder_id": "yuki_hitori", "score": 529},
-        {"atcoder_id": "blue_island", "score": 0},
-        {"atcoder_id": "carduusmille", "score": 0},
-    ]
     await send_weekly_reset_message(
         interaction.guild,
-        week_start_jst(now_utc()) - timedelta(days=7),
-        fake_scores,
+        current_week_start() - timedelta(days=7),
+        DEBUG_RESET_SCORES,
         next_week_start_jst(now_utc()),
         force_ai=True,
         channel_override=interaction.channel,
@@ -1634,10 +1842,9 @@ async def profile(interaction: discord.Interaction, user: discord.Member | None
         await interaction.response.send_message("DB未接続", ephemeral=True)
         return
     target = user or interaction.user
-    rating = await db.get_rating(pool, target.id)
-    streak = await db.get_streak(pool, target.id)
+    profile = await db.get_profile(reader(), target.id) or {"rating": 0, "current_streak": 0}
     await interaction.response.send_message(
-        f"{target.mention}\nレート: {rating}\nストリーク: {streak['current_streak']}日",
+        f"{target.mention}\nレート: {profile['rating']}\nストリーク: {profile['current_streak']}日",
         ephemeral=True,
     )
 
@@ -1654,9 +1861,10 @@ async def goal_set(interaction: discord.Interaction, score: int) -> None:
     if score <= 0:
         await interaction.response.send_message("目標スコアは1以上を指定してください", ephemeral=True)
         return
-    ws = week_start_jst(now_utc())
+    ws = current_week_start()
     await db.upsert_weekly_goal(pool, interaction.user.id, ws, score)
-    current_score = await db.get_weekly_score(pool, ws, interaction.user.id)
+    invalidate_weekly_goal(interaction.user.id, ws)
+    current_score = await get_weekly_score_cached(ws, interaction.user.id)
     embed = build_goal_embed(current_score, score, title="🎯 目標を設定しました")
     await interaction.response.send_message(embed=embed)
 
@@ -1666,13 +1874,13 @@ async def goal_show(interaction: discord.Interaction) -> None:
     if not pool:
         await interaction.response.send_message("DB未接続", ephemeral=True)
         return
-    ws = week_start_jst(now_utc())
-    goal = await db.get_weekly_goal(pool, interaction.user.id, ws)
+    ws = current_week_start()
+    goal = await get_weekly_goal_cached(interaction.user.id, ws)
     if not goal:
         await interaction.response.send_message("今週の目標が設定されていません。`/goal set` で設定してください", ephemeral=True)
         return
     target = goal["target_score"]
-    current_score = await db.get_weekly_score(pool, ws, interaction.user.id)
+    current_score = await get_weekly_score_cached(ws, interaction.user.id)
     embed = build_goal_embed(current_score, target)
     await interaction.response.send_message(embed=embed)
 
@@ -1682,12 +1890,13 @@ async def goal_clear(interaction: discord.Interaction) -> None:
     if not pool:
         await interaction.response.send_message("DB未接続", ephemeral=True)
         return
-    week_start = week_start_jst(now_utc())
-    goal = await db.get_weekly_goal(pool, interaction.user.id, week_start)
+    week_start = current_week_start()
+    goal = await get_weekly_goal_cached(interaction.user.id, week_start)
     if not goal:
         await interaction.response.send_message("今週の目標が設定されていません", ephemeral=True)
         return
     await db.delete_weekly_goal(pool, interaction.user.id, week_start)
+    invalidate_weekly_goal(interaction.user.id, week_start)
     await interaction.response.send_message("週間目標を解除しました")
 
 
@@ -1714,12 +1923,7 @@ class RegisterModal(discord.ui.Modal, title="AtCoder ID 登録"):
         if GUILD_ID:
             guild = bot.get_guild(GUILD_ID)
             if guild and session:
-                rating = await atcoder_api.fetch_user_rating(session, normalized)
-                if rating is not None:
-                    await db.upsert_rating(pool, interaction.user.id, rating)
-                    member = guild.get_member(interaction.user.id)
-                    if member:
-                        await apply_color_role(member, rating)
+                spawn_background(sync_registered_rating(guild, interaction.user.id, normalized))
 
 
 class GoalSetModal(discord.ui.Modal, title="週間目標を設定"):
@@ -1742,9 +1946,10 @@ class GoalSetModal(discord.ui.Modal, title="週間目標を設定"):
         if score <= 0:
             await interaction.response.send_message("❌ 1以上の数値を入力してください", ephemeral=True)
             return
-        ws = week_start_jst(now_utc())
+        ws = current_week_start()
         await db.upsert_weekly_goal(pool, interaction.user.id, ws, score)
-        current_score = await db.get_weekly_score(pool, ws, interaction.user.id)
+        invalidate_weekly_goal(interaction.user.id, ws)
+        current_score = await get_weekly_score_cached(ws, interaction.user.id)
         embed = build_goal_embed(current_score, score, title="🎯 目標を設定しました")
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -1758,11 +1963,12 @@ class ConfirmUnregisterView(discord.ui.View):
         if not pool:
             await interaction.response.send_message("DB未接続", ephemeral=True)
             return
-        await db.deactivate_user(pool, interaction.user.id)
+        member = None
         if interaction.guild:
-            member = interaction.guild.get_member(interaction.user.id)
-            if member:
-                await remove_user_roles(member)
+            member = interaction.user
+            if not isinstance(member, discord.Member):
+                member = interaction.guild.get_member(interaction.user.id)
+        await deactivate_member(interaction.user.id, member)
         await interaction.response.edit_message(content="✅ 登録を解除しました", view=None)
 
     @discord.ui.button(label="キャンセル", style=discord.ButtonStyle.secondary)
@@ -1779,8 +1985,9 @@ class ConfirmGoalClearView(discord.ui.View):
         if not pool:
             await interaction.response.send_message("DB未接続", ephemeral=True)
             return
-        ws = week_start_jst(now_utc())
+        ws = current_week_start()
         await db.delete_weekly_goal(pool, interaction.user.id, ws)
+        invalidate_weekly_goal(interaction.user.id, ws)
         await interaction.response.edit_message(content="✅ 週間目標を解除しました", view=None)
 
     @discord.ui.button(label="キャンセル", style=discord.ButtonStyle.secondary)
@@ -1788,6 +1995,20 @@ class ConfirmGoalClearView(discord.ui.View):
         await interaction.response.edit_message(content="❌ キャンセルしました", view=None)
 
 
+def is_repeat_click(interaction: discord.Interaction, custom_id: str) -> bool:
+    # double-clicks on the persistent menu would rerun the same reads within a second
+    now = time.monotonic()
+    key = (interaction.user.id, custom_id)
+    last = _menu_clicks.get(key)
+    if last is not None and now - last < MENU_CLICK_DEBOUNCE_SECONDS:
+        return True
+    # only clicks inside the window matter; pruning on write keeps the dict to recent clickers
+    for stale in [k for k, t in _menu_clicks.items() if now - t >= MENU_CLICK_DEBOUNCE_SECONDS]:
+        del _menu_clicks[stale]
+    _menu_clicks[key] = now
+    return False
+
+
 class MenuView(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=None)
@@ -1813,13 +2034,16 @@ class MenuView(discord.ui.View):
         if not pool:
             await interaction.response.send_message("DB未接続", ephemeral=True)
             return
-        ws = week_start_jst(now_utc())
-        goal = await db.get_weekly_goal(pool, interaction.user.id, ws)
+        if is_repeat_click(interaction, button.custom_id):
+            await interaction.response.defer()
+            return
+        ws = current_week_start()
+        goal = await get_weekly_goal_cached(interaction.user.id, ws)
         if not goal:
             await interaction.response.send_message("📊 今週の目標が設定されていません", ephemeral=True)
             return
         target = goal["target_score"]
-        current_score = await db.get_weekly_score(pool, ws, interaction.user.id)
+        current_score = await get_weekly_score_cached(ws, interaction.user.id)
         embed = build_goal_embed(current_score, target)
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -1828,8 +2052,11 @@ class MenuView(discord.ui.View):
         if not pool:
             await interaction.response.send_message("DB未接続", ephemeral=True)
             return
-        ws = week_start_jst(now_utc())
-        goal = await db.get_weekly_goal(pool, interaction.user.id, ws)
+        if is_repeat_click(interaction, button.custom_id):
+            await interaction.response.defer()
+            return
+        ws = current_week_start()
+        goal = await get_weekly_goal_cached(interaction.user.id, ws)
         if not goal:
             await interaction.response.send_message("📊 今週の目標が設定されていません", ephemeral=True)
             return
@@ -1845,16 +2072,17 @@ class MenuView(discord.ui.View):
         if not pool:
             await interaction.response.send_message("DB未接続", ephemeral=True)
             return
-        rating = await db.get_rating(pool, interaction.user.id)
-        streak = await db.get_streak(pool, interaction.user.id)
-        atcoder_id = await db.get_user_atcoder_id(pool, interaction.user.id)
-        if not atcoder_id:
+        if is_repeat_click(interaction, button.custom_id):
+            await interaction.response.defer()
+            return
+        profile = await db.get_profile(reader(), interaction.user.id)
+        if not profile:
             await interaction.response.send_message("❌ 登録されていません", ephemeral=True)
             return
         await interaction.response.send_message(
-            f"👤 **{atcoder_id}**\n"
-            f"レート: {rating}\n"
-            f"ストリーク: {streak['current_streak']}日",
+            f"👤 **{profile['atcoder_id']}**\n"
+            f"レート: {profile['rating']}\n"
+            f"ストリーク: {profile['current_streak']}日",
             ephemeral=True,
         )
 
@@ -1864,21 +2092,27 @@ async def menu_command(interaction: discord.Interaction) -> None:
     if not interaction.user.guild_permissions.administrator:
         await interaction.response.send_message("管理者のみ実行できます", ephemeral=True)
         return
-    embed = discord.Embed(
-        title="📋 AtCrank メニュー",
-        description="ボタンをクリックして操作できます",
-        color=discord.Colour.blue(),
-    )
-    embed.add_field(name="🔑 登録", value="AtCoder IDを登録・解除", inline=False)
-    embed.add_field(name="🎯 週間目標", value="目標の設定・確認・解除", inline=False)
-    embed.add_field(name="👤 プロフィール", value="自分の情報を確認", inline=False)
-    await interaction.response.send_message(embed=embed, view=MenuView())
+    await interaction.response.send_message(embed=MENU_EMBED, view=_menu_view or MenuView())
+
+
+MENU_EMBED = discord.Embed(
+    title="📋 AtCrank メニュー",
+    description="ボタンをクリックして操作できます",
+    color=discord.Colour.blue(),
+)
+MENU_EMBED.add_field(name="🔑 登録", value="AtCoder IDを登録・解除", inline=False)
+MENU_EMBED.add_field(name="🎯 週間目標", value="目標の設定・確認・解除", inline=False)
+MENU_EMBED.add_field(name="👤 プロフィール", value="自分の情報を確認", inline=False)
+# View() needs a running loop, so the shared persistent instance is built in setup_hook
+_menu_view: MenuView | None = None
 
 
 # Bot起動時にPersistent Viewを登録
 @bot.event
 async def setup_hook():
-    bot.add_view(MenuView())
+    global _menu_view
+    _menu_view = MenuView()
+    bot.add_view(_menu_view)
 
 
 if __name__ == "__main__":
@@ -112,3 +112,11 @@ create table if not exists weekly_goals (
   created_at text not null default CURRENT_TIMESTAMP,
   primary key (discord_id, week_start)
 );
+
+create table if not exists http_cache (
+  url text primary key,
+  etag text,
+  last_modified text,
+  body blob not null,
+  updated_at text not null default CURRENT_TIMESTAMP
+);
@@ -20,3 +20,84 @@ NOTIFY_TEMPLATES = {
         "{user} 伝説級AC！ 👑",
     ],
 }
+
+AC_AI_PROMPT = (
+    "AtCoderのAC通知に添える一言を作成。\n\n"
+    "<状況>\n"
+    "- ユーザー: {atcoder_id}\n"
+    "- 問題: {title}\n"
+    "- 獲得スコア: +{score}pts（高いほど難しい問題）\n"
+    "- 週間累計: {weekly_score}pts\n"
+    "- 問題難易度: {difficulty}（数値が高いほど難問）\n"
+    "- ユーザーレート: {rating}\n"
+    "- 連続AC日数: {streak}日\n"
+    "- スコア帯の目安:\n"
+    "  - 0〜199: 軽め/基礎\n"
+    "  - 200〜349: 標準〜やや高め\n"
+    "  - 350以上: 高難度/難問\n"
+    "</状況>\n\n"
+    "<条件>\n"
+    "- 日本語1文、25〜60文字\n"
+    "- 絵文字1〜2個\n"
+    "- ポジティブで自然な口調\n"
+    "- 状況に合わせて言及（streak長い→継続を褒める、高難度→突破を称える等）\n"
+    "- 語彙制約: {hard_rule}\n"
+    "- 難易度の表現は必須ではないが、入れる場合はスコア帯の目安に従うこと\n"
+    "- 直近5件の通知と被らない内容にする（焦点を変える：例=難易度/継続/スコア/ペース/達成感など）\n"
+    "</条件>\n\n"
+    "<例>\n"
+    "- ナイスAC！勢いがあるね🔥\n"
+    "- 難問突破おめでとう！実力ついてきた✨\n"
+    "- 7日連続AC、習慣化できてる💪\n"
+    "- 着実に積み上げてるね、いい調子👍\n"
+    "</例>\n\n"
+    "<直近5件の通知（重複回避の参考）>\n"
+    "{recent_text}\n"
+    "</直近5件の通知>\n\n"
+    "一言のみ出力（説明不要）："
+)
+
+WEEKLY_RESET_AI_PROMPT = (
+    "週間ランキングリセットに添えるコメントを作成。\n\n"
+    "<今週の結果>\n"
+    "- 参加人数: {total_users}人\n"
+    "- 上位3名: {top}\n"
+    "- 2週連続で上位3入り: {repeated}\n"
+    "- 前週からの伸び: {deltas}\n"
+    "</今週の結果>\n\n"
+    "<過去5週のランキング>\n"
+    "{past_rankings}\n"
+    "</過去5週のランキング>\n\n"
+    "<過去のコメント（重複を避ける参考）>\n"
+    "{recent_text}\n"
+    "</過去のコメント>\n\n"
+    "<条件>\n"
+    "- 日本語2〜3文、60〜120文字程度\n"
+    "- 絵文字2〜3個\n"
+    "- 一週間の労いと来週への応援\n"
+    "- ユーモアや個性を交えて\n"
+    "- 過去と被らない表現で\n"
+    "- 上位者や伸びた人に言及してもよいし、全体を労うだけでもよい\n"
+    "</条件>\n\n"
+    "メッセージのみ出力："
+)
+
+GOAL_AI_PROMPT = (
+    "週間目標達成のお祝いメッセージを作成。\n\n"
+    "<状況>\n"
+    "- ユーザー: {atcoder_id}\n"
+    "- 目標: {target_score}pts\n"
+    "- 達成スコア: {current_score}pts\n"
+    "</状況>\n\n"
+    "<条件>\n"
+    "- 日本語2〜3文、60〜120文字程度\n"
+    "- 絵文字2〜3個\n"
+    "- 達成を盛大に称え、ユーモアや個性を交えて\n"
+    "- 次への意欲も促す\n"
+    "</条件>\n\n"
+    "<例>\n"
+    "- 目標達成おめでとう！🎉 自分で決めた目標をクリアするの、最高にかっこいい。来週もその調子で攻めていこう💪\n"
+    "- やりましたね！✨ コツコツ積み上げた努力が実を結んだ瞬間。この勢いで次の目標も粉砕しちゃおう🔥\n"
+    "</例>\n\n"
+    "メッセージのみ出力："
+)
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+import atcoder_api
+from atcoder_api import (
+    _BACKOFF_BASE,
+    _BACKOFF_CAP,
+    _CIRCUIT_COOLDOWN_SECONDS,
+    _CIRCUIT_FAILURE_THRESHOLD,
+    HostCircuit,
+    _next_backoff,
+)
+
+
+def test_next_backoff_stays_within_bounds():
+    prev = _BACKOFF_BASE
+    for _ in range(20):
+        delay = _next_backoff(prev)
+        assert _BACKOFF_BASE <= delay <= min(_BACKOFF_CAP, prev * 3)
+        prev = delay
+
+
+def test_next_backoff_is_capped():
+    assert _next_backoff(1000.0) <= _BACKOFF_CAP
+
+
+def test_host_circuit_opens_after_threshold():
+    circuit = HostCircuit()
+    for _ in range(_CIRCUIT_FAILURE_THRESHOLD - 1):
+        circuit.record_failure()
+    assert circuit.allow()
+    circuit.record_failure()
+    assert not circuit.allow()
+
+
+def test_host_circuit_success_resets():
+    circuit = HostCircuit()
+    for _ in range(_CIRCUIT_FAILURE_THRESHOLD):
+        circuit.record_failure()
+    circuit.record_success()
+    assert circuit.allow()
+
+
+def _open_circuit(monkeypatch, clock: list[float]) -> HostCircuit:
+    monkeypatch.setattr(atcoder_api.time, "monotonic", lambda: clock[0])
+    circuit = HostCircuit()
+    for _ in range(_CIRCUIT_FAILURE_THRESHOLD):
+        circuit.record_failure()
+    clock[0] += _CIRCUIT_COOLDOWN_SECONDS
+    return circuit
+
+
+def test_host_circuit_half_open_admits_one_probe(monkeypatch):
+    clock = [1000.0]
+    circuit = _open_circuit(monkeypatch, clock)
+    assert circuit.allow()
+    assert not circuit.allow()
+    circuit.record_success()
+    assert circuit.allow()
+    assert circuit.allow()
+
+
+def test_host_circuit_failed_probe_reopens(monkeypatch):
+    clock = [1000.0]
+    circuit = _open_circuit(monkeypatch, clock)
+    assert circuit.allow()
+    circuit.record_failure()
+    assert not circuit.allow()
+    clock[0] += _CIRCUIT_COOLDOWN_SECONDS
+    assert circuit.allow()
+
+
+@pytest.mark.asyncio
+async def test_fetch_single_flight(monkeypatch):
+    calls = 0
+
+    async def fake_fetch_once(session, url, headers=None):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 200, b"[1]", {}
+
+    monkeypatch.setattr(atcoder_api, "_fetch_once", fake_fetch_once)
+    results = await asyncio.gather(*(atcoder_api.fetch_json(None, "https://example.com/a") for _ in range(5)))
+    assert results == [[1]] * 5
+    assert calls == 1
+    assert not atcoder_api._inflight
+
+
+@pytest.mark.asyncio
+async def test_fetch_waiters_survive_leader_cancellation(monkeypatch):
+    calls = 0
+
+    async def fake_fetch_once(session, url, headers=None):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 200, b"[1]", {}
+
+    monkeypatch.setattr(atcoder_api, "_fetch_once", fake_fetch_once)
+    url = "https://example.com/b"
+    leader = asyncio.create_task(atcoder_api.fetch_json(None, url))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(atcoder_api.fetch_json(None, url)) for _ in range(3)]
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await asyncio.gather(*waiters) == [[1]] * 3
+    assert leader.cancelled()
+    assert calls == 2
+    assert not atcoder_api._inflight
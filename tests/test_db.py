@@ -1,13 +1,29 @@
 import asyncio
 import os
+import sqlite3
 import tempfile
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 
 import pytest
+import pytest_asyncio
 
 import db
 
 
+@pytest.fixture
+def db_path(tmp_path):
+    # tmp_path also collects the -wal/-shm sidecars WAL mode leaves next to the database
+    return str(tmp_path / "atcrank.db")
+
+
+@pytest_asyncio.fixture
+async def conn(db_path):
+    conn = await db.create_db(db_path)
+    await db.init_db(conn)
+    yield conn
+    await conn.close()
+
+
 @pytest.mark.asyncio
 async def test_db_basic_flow():
     fd, path = tempfile.mkstemp(suffix=".db")
@@ -35,3 +51,238 @@ async def test_db_basic_flow():
     finally:
         if os.path.exists(path):
             os.remove(path)
+
+
+@pytest.mark.asyncio
+async def test_transaction_commits_and_rolls_back(conn):
+    async with db.transaction(conn):
+        await db.upsert_user(conn, 1, "alice")
+        await db.upsert_rating(conn, 1, 1200)
+    assert await db.get_rating(conn, 1) == 1200
+
+    with pytest.raises(RuntimeError):
+        async with db.transaction(conn):
+            await db.upsert_rating(conn, 1, 1600)
+            raise RuntimeError("boom")
+    assert await db.get_rating(conn, 1) == 1200
+
+
+@pytest.mark.asyncio
+async def test_plain_write_does_not_join_another_tasks_transaction(conn):
+    await db.upsert_user(conn, 1, "alice")
+    await db.update_fetch_state(conn, 1, 100, None)
+    entered = asyncio.Event()
+    release = asyncio.Event()
+
+    async def failing_tx() -> None:
+        async with db.transaction(conn):
+            await db.upsert_rating(conn, 1, 1600)
+            entered.set()
+            await release.wait()
+            raise RuntimeError("boom")
+
+    tx_task = asyncio.create_task(failing_tx())
+    await entered.wait()
+    write_task = asyncio.create_task(db.update_fetch_state(conn, 1, 424242, None))
+    await asyncio.sleep(0.01)
+    release.set()
+    with pytest.raises(RuntimeError):
+        await tx_task
+    await write_task
+
+    assert (await db.get_fetch_state(conn, 1))["last_checked_epoch"] == 424242
+    assert await db.get_rating(conn, 1) == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writers_share_one_connection(conn):
+    await db.upsert_user(conn, 1, "alice")
+
+    async def tx_writer(i: int) -> None:
+        async with db.transaction(conn):
+            await db.add_weekly_score(conn, "w", 1, 1)
+            await asyncio.sleep(0)
+            await db.upsert_rating(conn, 1, i)
+
+    async def plain_writer(i: int) -> None:
+        await db.update_fetch_state(conn, 1, i, None)
+        await db.add_weekly_score(conn, "w", 1, 1)
+
+    # plain writes queued first put DML in flight while the transactions check and BEGIN
+    await asyncio.gather(*(coro for i in range(20) for coro in (plain_writer(i), tx_writer(i))))
+
+    assert await db.get_weekly_score(conn, "w", 1) == 40
+    assert not conn.in_transaction
+
+
+@pytest.mark.asyncio
+async def test_weekly_scores_ordering_uses_rank_index(conn):
+    await db.upsert_user(conn, 1, "alice")
+    await db.upsert_user(conn, 2, "bob")
+    week_start = datetime(2026, 1, 12, 7, 0, tzinfo=timezone.utc)
+    await db.add_weekly_score(conn, week_start, 1, 100)
+    await db.add_weekly_score(conn, week_start, 2, 300)
+
+    scores = await db.get_weekly_scores(conn, week_start)
+    assert [row["atcoder_id"] for row in scores] == ["bob", "alice"]
+    assert scores[0].get("score") == 300
+
+    cursor = await conn.execute(
+        """
+        explain query plan
+        select w.discord_id from weekly_scores w
+        left join users u on w.discord_id = u.discord_id
+        where w.week_start=?
+        order by w.score desc, w.score_updated_at asc
+        """,
+        ("x",),
+    )
+    plan = " ".join(row[3] for row in await cursor.fetchall())
+    assert "weekly_scores_rank_idx" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.asyncio
+async def test_weekly_scores_multi_groups_by_week(conn):
+    await db.upsert_user(conn, 1, "alice")
+    await db.upsert_user(conn, 2, "bob")
+    week1 = datetime(2026, 1, 5, 7, 0, tzinfo=timezone.utc)
+    week2 = datetime(2026, 1, 12, 7, 0, tzinfo=timezone.utc)
+    week3 = datetime(2026, 1, 19, 7, 0, tzinfo=timezone.utc)
+    await db.add_weekly_score(conn, week1, 1, 10)
+    await db.add_weekly_score(conn, week1, 2, 30)
+    await db.add_weekly_score(conn, week2, 1, 50)
+
+    result = await db.get_weekly_scores_multi(conn, [week2, week3, week1])
+    assert [[row["atcoder_id"] for row in rows] for rows in result] == [["alice"], [], ["bob", "alice"]]
+    assert [row["score"] for row in result[2]] == [30, 10]
+
+
+@pytest.mark.asyncio
+async def test_get_profile_joins_rating_and_streak(conn):
+    assert await db.get_profile(conn, 1) is None
+
+    await db.upsert_user(conn, 1, "alice")
+    assert await db.get_profile(conn, 1) == {"atcoder_id": "alice", "rating": 0, "current_streak": 0}
+
+    await db.upsert_rating(conn, 1, 1234)
+    await db.update_streak(conn, 1, 3, date(2026, 1, 20))
+    assert await db.get_profile(conn, 1) == {"atcoder_id": "alice", "rating": 1234, "current_streak": 3}
+
+
+@pytest.mark.asyncio
+async def test_upsert_ratings_bulk(conn):
+    await db.upsert_user(conn, 1, "alice")
+    await db.upsert_user(conn, 2, "bob")
+    await db.upsert_rating(conn, 1, 800)
+
+    await db.upsert_ratings(conn, [(1, 1200), (2, 2400)])
+    assert await db.get_rating(conn, 1) == 1200
+    assert await db.get_rating(conn, 2) == 2400
+
+
+@pytest.mark.asyncio
+async def test_get_ac_context_defaults_and_values(conn):
+    await db.upsert_user(conn, 1, "alice")
+    context = await db.get_ac_context(conn, 1, "abc100_a")
+    assert context == {"problem": None, "rating": 0, "current_streak": 0, "last_ac_date": None}
+
+    await db.upsert_problems(
+        conn,
+        [{"problem_id": "abc100_a", "contest_id": "abc100", "title": "A", "difficulty_raw": None, "difficulty": 300}],
+    )
+    await db.upsert_rating(conn, 1, 1500)
+    await db.update_streak(conn, 1, 4, date(2026, 1, 20))
+    context = await db.get_ac_context(conn, 1, "abc100_a")
+    assert context["problem"] == await db.get_problem(conn, "abc100_a")
+    assert context["rating"] == await db.get_rating(conn, 1)
+    assert context["current_streak"] == 4
+    assert context["last_ac_date"] == date(2026, 1, 20)
+
+
+@pytest.mark.asyncio
+async def test_http_cache_roundtrip(conn):
+    url = "https://example.com/problems.json"
+    assert await db.get_http_validators(conn, url) is None
+    assert await db.get_http_cache_body(conn, url) is None
+
+    await db.store_http_cache(conn, url, '"v1"', None, b"[]")
+    await db.store_http_cache(conn, url, '"v2"', "Mon, 19 Jan 2026 00:00:00 GMT", b"[1]")
+    assert await db.get_http_validators(conn, url) == {
+        "etag": '"v2"',
+        "last_modified": "Mon, 19 Jan 2026 00:00:00 GMT",
+    }
+    assert await db.get_http_cache_body(conn, url) == b"[1]"
+
+
+@pytest.mark.asyncio
+async def test_record_accept_writes_all_rows(conn):
+    await db.upsert_user(conn, 1, "alice")
+    await db.upsert_problems(conn, [{"problem_id": "abc001_a", "contest_id": "abc001"}])
+    submitted_at = datetime(2026, 1, 13, 3, 0, tzinfo=timezone.utc)
+    week_start = datetime(2026, 1, 11, 22, 0, tzinfo=timezone.utc)
+
+    await db.record_accept(
+        conn,
+        discord_id=1,
+        problem_id="abc001_a",
+        submitted_at=submitted_at,
+        week_start=week_start,
+        score_base=200,
+        streak_mult=1.05,
+        score_final=210,
+        current_streak=1,
+        last_ac_date=date(2026, 1, 13),
+    )
+
+    assert await db.get_weekly_score(conn, week_start, 1) == 210
+    assert await db.get_last_ac(conn, 1, "abc001_a") == submitted_at
+    streak = await db.get_streak(conn, 1)
+    assert streak["current_streak"] == 1
+    assert streak["last_ac_date"] == date(2026, 1, 13)
+
+
+@pytest.mark.asyncio
+async def test_fanned_out_user_writes_stay_consistent(conn):
+    users = range(1, 11)
+    await db.upsert_problems(conn, [{"problem_id": f"abc00{i}_a"} for i in range(3)])
+    for uid in users:
+        await db.upsert_user(conn, uid, f"user{uid}")
+    week_start = datetime(2026, 1, 11, 22, 0, tzinfo=timezone.utc)
+
+    async def poll(uid: int) -> None:
+        # mirrors poll_user: one record_accept per AC, then the fetch state
+        for i in range(3):
+            await db.record_accept(
+                conn,
+                discord_id=uid,
+                problem_id=f"abc00{i}_a",
+                submitted_at=datetime(2026, 1, 13, 3, i, tzinfo=timezone.utc),
+                week_start=week_start,
+                score_base=100,
+                streak_mult=1.0,
+                score_final=100,
+                current_streak=1,
+                last_ac_date=date(2026, 1, 13),
+            )
+        await db.update_fetch_state(conn, uid, 1000 + uid, None)
+
+    await asyncio.gather(*(poll(uid) for uid in users))
+
+    for uid in users:
+        assert await db.get_weekly_score(conn, week_start, uid) == 300
+        assert (await db.get_fetch_state(conn, uid))["last_checked_epoch"] == 1000 + uid
+
+
+@pytest.mark.asyncio
+async def test_read_connection_sees_commits_and_rejects_writes(conn, db_path):
+    reader = await db.create_read_db(db_path)
+    try:
+        await db.upsert_user(conn, 1, "alice")
+        users = await db.get_active_users(reader)
+        assert [u["atcoder_id"] for u in users] == ["alice"]
+
+        with pytest.raises(sqlite3.OperationalError):
+            await db.upsert_user(reader, 2, "bob")
+    finally:
+        await reader.close()
@@ -0,0 +1,34 @@
+import ast
+import builtins
+from pathlib import Path
+
+MAIN = Path(__file__).resolve().parents[1] / "main.py"
+
+
+def _bound_names(tree: ast.AST) -> set[str]:
+    # every name the module binds anywhere; coarser than real scoping but enough to catch typos
+    names = set(dir(builtins))
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, ast.alias):
+            names.add((node.asname or node.name).split(".")[0])
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+    return names
+
+
+def test_main_has_no_undefined_names():
+    # slash-command bodies never run under pytest, so a misspelled helper only shows up here
+    tree = ast.parse(MAIN.read_text(), filename=str(MAIN))
+    bound = _bound_names(tree)
+    undefined = sorted(
+        f"{node.lineno}: {node.id}"
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id not in bound
+    )
+    assert undefined == []
@@ -1,8 +1,9 @@
 import math
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
-from utils import display_difficulty, week_start_jst
+import utils
+from utils import current_week_start, display_difficulty, week_start_jst
 
 
 def test_display_difficulty_above_400():
@@ -26,3 +27,13 @@ def test_week_start_jst():
     assert week_start_jst_dt.day == 12
     assert week_start_jst_dt.hour == 7
     assert week_start_jst_dt.minute == 0
+
+
+def test_current_week_start_rolls_over_at_boundary(monkeypatch):
+    boundary = datetime(2026, 1, 18, 22, 0, tzinfo=timezone.utc)  # Monday 07:00 JST
+    now = boundary - timedelta(seconds=1)
+    monkeypatch.setattr(utils, "now_utc", lambda: now)
+    monkeypatch.setattr(utils, "_current_week", None)
+    assert current_week_start() == boundary - timedelta(days=7)
+    now = boundary
+    assert current_week_start() == boundary
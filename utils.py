@@ -1,4 +1,5 @@
 import math
+from bisect import bisect_right
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
@@ -14,7 +15,11 @@ def to_jst(dt: datetime) -> datetime:
 
 
 def week_start_jst(dt: datetime) -> datetime:
-    jst = to_jst(dt)
+    return week_start_of_jst(to_jst(dt))
+
+
+def week_start_of_jst(jst: datetime) -> datetime:
+    # for callers that already hold a JST datetime
     monday = (jst - timedelta(days=jst.weekday())).replace(
         hour=7, minute=0, second=0, microsecond=0
     )
@@ -23,6 +28,19 @@ def week_start_jst(dt: datetime) -> datetime:
     return monday.astimezone(timezone.utc)
 
 
+_current_week: tuple[datetime, datetime] | None = None
+
+
+def current_week_start() -> datetime:
+    # week_start_jst(now_utc()) without the tz math until the cached week's bounds are crossed
+    global _current_week
+    now = now_utc()
+    if _current_week is None or not _current_week[0] <= now < _current_week[1]:
+        start = week_start_jst(now)
+        _current_week = (start, start + timedelta(days=7))
+    return _current_week[0]
+
+
 def next_week_start_jst(dt: datetime) -> datetime:
     current = week_start_jst(dt)
     return current + timedelta(days=7)
@@ -34,24 +52,14 @@ def display_difficulty(difficulty_raw: float) -> int:
     return round(difficulty_raw)
 
 
+_COLOR_THRESHOLDS = (400, 800, 1200, 1600, 2000, 2400, 2800)
+_COLOR_KEYS = ("gray", "brown", "green", "cyan", "blue", "yellow", "orange", "red")
+
+
 def color_key(value: int | None) -> str:
-    if value is None or value <= 0:
-        return "gray"
-    if value < 400:
+    if value is None:
         return "gray"
-    if value < 800:
-        return "brown"
-    if value < 1200:
-        return "green"
-    if value < 1600:
-        return "cyan"
-    if value < 2000:
-        return "blue"
-    if value < 2400:
-        return "yellow"
-    if value < 2800:
-        return "orange"
-    return "red"
+    return _COLOR_KEYS[bisect_right(_COLOR_THRESHOLDS, value)]
 
 
 COLOR_EMOJI = {
@@ -65,6 +73,15 @@ COLOR_EMOJI = {
     "red": "🟥",
 }
 
+_COLOR_EMOJI_BY_BUCKET = tuple(COLOR_EMOJI[key] for key in _COLOR_KEYS)
+
+
+def color_emoji(value: int | None) -> str:
+    if value is None:
+        return COLOR_EMOJI["gray"]
+    return _COLOR_EMOJI_BY_BUCKET[bisect_right(_COLOR_THRESHOLDS, value)]
+
+
 COLOR_NAMES = {
     "gray": "Gray",
     "brown": "Brown",